@@ -0,0 +1,212 @@
+import argparse
+import copy
+import csv
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from rdf_convert import MAPPINGS, LOCAL
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEI_NS = "http://www.tei-c.org/ns/1.0"
+
+# ======== Synthetic Data ========= #
+
+def suffix_ref(val, k):
+    # k-th copy of an id or "local:" reference; copy 0 is the original
+    return val if k == 0 else f"{val.strip()}_{k}"
+
+def generate_csvs(src_dir, dest_dir, scale):
+    """Write every table `scale` times over, with ids and local: references renamed per copy.
+
+    References are renamed consistently, so copy k only points at copy k
+    and the synthetic tables stay referentially intact. Returns rows written.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    total = 0
+    for name, spec in MAPPINGS.items():
+        src = os.path.join(src_dir, name)
+        if not os.path.exists(src):
+            continue
+        # Benchmarks only need the shape of the data: tolerate non-UTF-8 bytes
+        with open(src, newline='', encoding='utf-8', errors='replace') as f:
+            rows = list(csv.reader(f))
+        header, body = rows[0], rows[1:]
+
+        id_cols = {header.index(c): None for c in spec["subject"] if c in header}
+        for c, col in spec["columns"].items():
+            if col.kind == LOCAL and c in header:
+                id_cols[header.index(c)] = col.sep
+
+        with open(os.path.join(dest_dir, name), "w", newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for k in range(scale):
+                for row in body:
+                    row = list(row)
+                    for i, sep in id_cols.items():
+                        if i < len(row) and row[i]:
+                            parts = row[i].split(sep) if sep else [row[i]]
+                            row[i] = (sep or "").join(suffix_ref(p, k) for p in parts if p.strip())
+                    writer.writerow(row)
+                    total += 1
+    return total
+
+def generate_tei(src_path, dest_path, scale):
+    """Repeat the scenes of a TEI screenplay `scale` times. Returns the scene count."""
+    from lxml import etree
+
+    tree = etree.parse(src_path)
+    body = tree.find(f".//{{{TEI_NS}}}body")
+    scenes = body.findall(f"{{{TEI_NS}}}div")
+    for k in range(1, scale):
+        for scene in scenes:
+            clone = copy.deepcopy(scene)
+            clone.set("n", f"{scene.get('n')}.{k}")
+            body.append(clone)
+    tree.write(dest_path, encoding="UTF-8", xml_declaration=True)
+    return len(scenes) * scale
+
+# ======== Measurement ========= #
+
+# Runs a script as __main__ and, at exit, records its own peak RSS. The child's
+# rusage can't be used: on Linux ru_maxrss keeps the parent's RSS from before exec.
+LAUNCHER = """
+import atexit, os, resource, runpy, sys
+
+def report():
+    peak = None
+    try:
+        with open("/proc/self/status") as f:
+            peak = next(int(l.split()[1]) for l in f if l.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            peak //= 1024
+    with open(os.environ["SP_BENCH_RSS_FILE"], "w") as f:
+        f.write(str(peak))
+
+atexit.register(report)
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+runpy.run_path(script, run_name="__main__")
+"""
+
+def run_stage(args, cwd, **env):
+    """Run one script in a child process; returns (seconds, peak RSS in KB, returncode, stderr tail).
+
+    Keyword arguments are added to the child's environment.
+    """
+    fd, rss_file = tempfile.mkstemp(prefix="sp_rss_")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", LAUNCHER] + args, cwd=cwd,
+                              env=dict(os.environ, SP_BENCH_RSS_FILE=rss_file, **env),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        seconds = time.perf_counter() - start
+        with open(rss_file) as f:
+            rss = int(f.read() or 0)
+    finally:
+        os.remove(rss_file)
+    return seconds, rss, proc.returncode, proc.stderr.decode("utf-8", "replace").strip()[-500:]
+
+def count_lines(path):
+    with open(path, "rb") as f:
+        return sum(1 for _ in f)
+
+def count_graph(path):
+    # Distinct triples, which is what the graph-mode stages hold and write
+    from rdflib import Graph
+    return len(Graph().parse(path, format="turtle"))
+
+def count_tokens(path):
+    from lxml import etree
+    tree = etree.parse(path)
+    return len(" ".join(tree.getroot().itertext()).split())
+
+def record(results, scale, stage, seconds, rss, code, err, **extra):
+    entry = {"scale": scale, "stage": stage, "seconds": round(seconds, 4), "peak_rss_kb": rss, "ok": code == 0}
+    for key, (amount, unit) in extra.items():
+        entry[key] = amount
+        if code == 0 and seconds > 0:
+            entry[f"{unit}_per_sec"] = round(amount / seconds, 1)
+    if code != 0:
+        entry["error"] = err
+    results.append(entry)
+    status = "ok" if code == 0 else "FAILED"
+    print(f"{scale:>7}x  {stage:<22} {seconds:>9.3f}s  {rss:>9} KB  {status}")
+
+def bench_scale(scale, work, results):
+    data_dir = os.path.join(work, "csvs")
+    text_dir = os.path.join(work, "fulltext")
+    os.makedirs(text_dir, exist_ok=True)
+
+    rows = generate_csvs(os.path.join(ROOT, "csvs"), data_dir, scale)
+    scenes = generate_tei(os.path.join(ROOT, "fulltext", "script.xml"), os.path.join(text_dir, "script.xml"), scale)
+    shutil.copy(os.path.join(ROOT, "fulltext", "scriptstyle.xsl"), text_dir)
+    print(f"{scale:>7}x  generated {rows} CSV rows, {scenes} scenes")
+
+    # --- RDF branch (rdf_convert reads the tables from its working directory) ---
+    rdf = os.path.join(ROOT, "rdf_convert.py")
+    nt = os.path.join(work, "master.nt")
+    t = run_stage([rdf, "--stream", "--format", "nt", "-o", nt], data_dir)
+    streamed = count_lines(nt) if t[2] == 0 else 0  # duplicates included
+    record(results, scale, "rdf_convert --stream", *t, rows=(rows, "rows"), triples=(streamed, "triples"))
+
+    ttl = os.path.join(work, "master.ttl")
+    t = run_stage([rdf, "-o", ttl], data_dir)
+    triples = count_graph(ttl) if t[2] == 0 else 0
+    record(results, scale, "rdf_convert", *t, rows=(rows, "rows"), triples=(triples, "triples"))
+
+    t = run_stage([rdf, "-j", "0", "-o", os.path.join(work, "parallel.ttl")], data_dir)
+    record(results, scale, "rdf_convert -j 0", *t, rows=(rows, "rows"), triples=(triples, "triples"))
+
+    if os.path.exists(ttl):
+        t = run_stage([os.path.join(ROOT, "xml_convert.py"), ttl, os.path.join(work, "master.xml")], work)
+        record(results, scale, "xml_convert", *t, triples=(triples, "triples"))
+
+    # --- Fulltext branch (scripts use fulltext/ relative to the working directory) ---
+    tokens = count_tokens(os.path.join(text_dir, "script.xml"))
+    t = run_stage([os.path.join(ROOT, "fulltext", "transform.py")], work)
+    record(results, scale, "transform", *t, tokens=(tokens, "tokens"))
+    # Each analyzer starts from its own empty sentiment cache, so neither is timed on the other's hits
+    for script in ("analysis.py", "character.analysis.py"):
+        cache = os.path.join(work, script.replace(".py", "") + ".sentiment.sqlite")
+        t = run_stage([os.path.join(ROOT, "fulltext", script)], work, SP_SENTIMENT_CACHE=cache)
+        record(results, scale, script.replace(".py", ""), *t, tokens=(tokens, "tokens"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the conversion and analysis scripts on scaled synthetic data.")
+    parser.add_argument("--scales", default="1,100,10000", help="comma-separated scale factors (default: 1,100,10000)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--keep", action="store_true", help="keep the generated data directories")
+    args = parser.parse_args()
+
+    results = []
+    for scale in [int(s) for s in args.scales.split(",")]:
+        work = tempfile.mkdtemp(prefix=f"sp_bench_{scale}x_")
+        try:
+            bench_scale(scale, work, results)
+        finally:
+            if args.keep:
+                print(f"{scale:>7}x  data kept in {work}")
+            else:
+                shutil.rmtree(work)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
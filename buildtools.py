@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# ======== Incremental Build Helpers ========= #
+#
+# Shared by the scripts that skip unchanged work (rdf_convert --cache,
+# transform, pipeline, entity_pages): content hashes and JSON manifests that
+# are replaced atomically, so an interrupted run never leaves a half-written one,
+# and the process pool the batch scripts fan their files out to.
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest(path):
+    # A missing or unreadable manifest means nothing is up to date
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def outdated(entries, name, key, path, force=False):
+    """True if path has to be rebuilt; its entry is then dropped until the rebuild succeeds."""
+    if not force and entries.get(name) == key and os.path.exists(path):
+        return False
+    entries.pop(name, None)
+    return True
+
+# ======== Worker Pools ========= #
+
+def pool_map(fn, items, jobs=1, initializer=None, initargs=()):
+    """Yield fn(item) in input order, across `jobs` worker processes (None = one per CPU).
+
+    One job or a single item runs in this process. The initializer warms each
+    worker once (compiled stylesheets, tokenizers, templates), and items are
+    sent in chunks of about a quarter of each worker's share.
+    """
+    if jobs == 1 or len(items) <= 1:
+        yield from map(fn, items)
+        return
+    chunksize = max(1, len(items) // ((jobs or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as pool:
+        yield from pool.map(fn, items, chunksize=chunksize)
+
+def guarded(job):
+    # Worker entry point: (fn, args) -> (result, None), or (None, message) if fn raised
+    fn, args = job
+    try:
+        return fn(*args), None
+    except Exception as e:
+        return None, str(e)
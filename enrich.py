@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from html.parser import HTMLParser
+from http.client import HTTPException
+from urllib.error import HTTPError
+from urllib.parse import urlsplit, quote
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+from rdflib import URIRef, Literal
+from rdf_convert import NS, init_graph, convert_all, default_data_dir
+from instrument import span, count
+
+# ======== Link Enrichment ========= #
+#
+# The tables only copy owl:sameAs (Wikidata) and foaf:page (fandom) links
+# through as IRIs. This stage looks them up and writes labels, descriptions,
+# aliases and Wikidata "instance of" classes for the linked resources into a
+# separate graph, so the master graph still builds offline.
+#
+# Requests are plain urllib calls run in threads from asyncio, with a cap on
+# requests in flight, a request rate budget, and Wikidata items fetched 50 per
+# request. Results are kept per IRI in SQLite with a time-to-live, so reruns
+# only fetch what is new or expired. --endpoint HOST=URL points a host at a
+# local stand-in server (tests/test_enrich.py runs the stage against one).
+
+LINKS = (NS["owl"]["sameAs"], NS["foaf"]["page"])
+CACHE_PATH = os.path.join(".build_cache", "enrich.sqlite")
+USER_AGENT = "LODbobomb-enrich/1.0 (Scott Pilgrim knowledge graph; python asyncio)"
+WIKIDATA_BATCH = 50
+WIKIDATA_API = "https://www.wikidata.org/w/api.php"
+WIKIDATA_ENTITY = "http://www.wikidata.org/entity/"
+
+WIKIDATA_ITEM = re.compile(r"^https?://(?:www\.)?wikidata\.org/(?:wiki|entity)/(Q\d+)$")
+FANDOM_PAGE = re.compile(r"^https?://[a-z0-9-]+\.fandom\.com/wiki/.+$")
+META_NAMES = ("og:title", "og:description", "description")
+
+# ======== HTTP Pool ========= #
+
+class HttpError(Exception):
+    pass
+
+class RoutedRedirects(HTTPRedirectHandler):
+    # Redirects to a host with a stand-in endpoint stay on the stand-in
+    def __init__(self, route):
+        self.route = route
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return super().redirect_request(req, fp, code, msg, headers, self.route(newurl))
+
+class HttpPool:
+    """GET requests made with urllib in worker threads.
+
+    At most `limit` requests are in flight, and requests start no faster than
+    `rate` per second (0 for no limit). Proxies come from the usual *_proxy
+    environment variables.
+    """
+
+    def __init__(self, limit=8, rate=5.0, timeout=30, endpoints=None, retries=2):
+        self.slots = asyncio.Semaphore(limit)
+        self.interval = 1 / rate if rate else 0
+        self.next_start = 0.0
+        self.timeout = timeout
+        self.endpoints = endpoints or {}  # host -> replacement base URL
+        self.retries = retries
+        self.opener = build_opener(RoutedRedirects(self.route))
+        self.requests = 0
+
+    def route(self, url):
+        # Send a host's requests to its stand-in base URL, keeping path and query
+        parts = urlsplit(url)
+        base = self.endpoints.get(parts.hostname)
+        if base:
+            url = base.rstrip("/") + parts.path + (f"?{parts.query}" if parts.query else "")
+        return url
+
+    async def throttle(self):
+        if self.interval:
+            now = asyncio.get_running_loop().time()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+            await asyncio.sleep(start - now)
+
+    def fetch(self, url):
+        """Blocking request, redirects followed; returns (status, headers, decoded body)."""
+        request = Request(quote(url, safe="/%:@!$&'()*+,;=-._~?#"),
+                          headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status, headers, body = response.status, response.headers, response.read()
+        except HTTPError as e:
+            with e:
+                status, headers, body = e.code, e.headers, e.read()
+        except HTTPException as e:
+            # A truncated body or malformed response, not an OSError
+            raise HttpError(f"{type(e).__name__} from {url}") from e
+        if headers.get("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return status, headers, body
+
+    async def get(self, url):
+        """(status, body) for url; 429/503 are retried after Retry-After."""
+        url = self.route(url)
+        async with self.slots:
+            attempt = 0
+            while True:
+                await self.throttle()
+                status, headers, body = await asyncio.to_thread(self.fetch, url)
+                self.requests += 1
+                count("http_requests")
+                if status in (429, 503) and attempt < self.retries:
+                    attempt += 1
+                    wait = headers.get("Retry-After", "")
+                    await asyncio.sleep(min(float(wait), 60) if wait.isdigit() else 2 ** attempt)
+                else:
+                    return status, body
+
+# ======== Response Cache ========= #
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    iri TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    data BLOB,
+    fetched REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+class FactCache:
+    """Extracted facts per IRI (zlib-compressed JSON), with a time-to-live in seconds.
+
+    Missing pages (404) are cached too, so dead links are not requested on
+    every run; server errors and timeouts are not cached.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=7 * 86400):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.ttl = ttl
+
+    def fresh(self, iris):
+        """{iri: facts or None} for every IRI cached within the TTL."""
+        found = {}
+        cutoff = time.time() - self.ttl
+        iris = list(iris)
+        for i in range(0, len(iris), 500):
+            batch = iris[i:i + 500]
+            rows = self.conn.execute(f"SELECT iri, data FROM facts WHERE fetched >= ? AND iri IN "
+                                     f"({','.join('?' * len(batch))})", [cutoff, *batch])
+            for iri, data in rows:
+                found[iri] = json.loads(zlib.decompress(data)) if data else None
+        return found
+
+    def store(self, results):
+        # results: {iri: (status, facts or None)}
+        now = time.time()
+        self.conn.executemany("INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?)", [
+            (iri, status, zlib.compress(json.dumps(facts).encode()) if facts else None, now)
+            for iri, (status, facts) in results.items()])
+
+    def close(self):
+        self.conn.close()
+
+# ======== Sources ========= #
+
+def wikidata_facts(entity):
+    """Label, description, aliases and P31 classes of one wbgetentities entity."""
+    label = entity.get("labels", {}).get("en", {}).get("value")
+    description = entity.get("descriptions", {}).get("en", {}).get("value")
+    aliases = [a["value"] for a in entity.get("aliases", {}).get("en", [])]
+    types = [c["mainsnak"]["datavalue"]["value"]["id"] for c in entity.get("claims", {}).get("P31", [])
+             if c.get("mainsnak", {}).get("snaktype") == "value"]
+    return {"label": label, "description": description, "aliases": aliases, "types": types}
+
+async def fetch_wikidata(pool, iris):
+    """{iri: (status, facts)} for up to WIKIDATA_BATCH item IRIs in one API request."""
+    ids = {}  # QID -> IRIs; the tables use both the /wiki/ and /entity/ forms
+    for iri in iris:
+        ids.setdefault(WIKIDATA_ITEM.match(iri)[1], []).append(iri)
+    url = (f"{WIKIDATA_API}?action=wbgetentities&format=json&languages=en"
+           f"&props=labels|descriptions|aliases|claims&ids={'|'.join(ids)}")
+    status, body = await pool.get(url)
+    if status != 200:
+        raise HttpError(f"{status} from wbgetentities")
+    entities = json.loads(body).get("entities", {})
+    # Redirected items come back under their target id
+    for entity in list(entities.values()):
+        source = entity.get("redirects", {}).get("from")
+        if source:
+            entities[source] = entity
+    results = {}
+    for qid, same in ids.items():
+        entity = entities.get(qid)
+        found = (404, None) if entity is None or "missing" in entity else (200, wikidata_facts(entity))
+        for iri in same:
+            results[iri] = found
+    return results
+
+class MetaTags(HTMLParser):
+    """Content of the META_NAMES <meta> tags, whichever order their attributes come in."""
+
+    def __init__(self):
+        super().__init__()
+        self.found = {}
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            name = (attrs.get("property") or attrs.get("name") or "").lower()
+            if name in META_NAMES and attrs.get("content") is not None:
+                self.found.setdefault(name, attrs["content"].strip())
+
+async def fetch_page(pool, iri):
+    """{iri: (status, facts)} from a fandom page's title and description meta tags."""
+    status, body = await pool.get(iri)
+    if status in (404, 410):
+        return {iri: (status, None)}
+    if status != 200:
+        raise HttpError(f"{status} from {iri}")
+    head = body[:200000].decode("utf-8", "replace")
+    parser = MetaTags()
+    parser.feed(head)
+    meta = parser.found
+    title = meta.get("og:title")
+    return {iri: (200, {"label": title, "description": meta.get("og:description") or meta.get("description")})}
+
+def plan(iris):
+    """Split IRIs into fetch jobs: Wikidata batches and single pages. Returns (jobs, unsupported)."""
+    wikidata = [i for i in iris if WIKIDATA_ITEM.match(i)]
+    pages = [i for i in iris if FANDOM_PAGE.match(i)]
+    jobs = [(fetch_wikidata, wikidata[i:i + WIKIDATA_BATCH]) for i in range(0, len(wikidata), WIKIDATA_BATCH)]
+    jobs += [(fetch_page, iri) for iri in pages]
+    return jobs, [i for i in iris if not WIKIDATA_ITEM.match(i) and not FANDOM_PAGE.match(i)]
+
+async def enrich(iris, cache, limit=8, rate=5.0, timeout=30, endpoints=None, refresh=False, offline=False):
+    """{iri: facts} for every supported IRI, fetching whatever the cache lacks. Returns (facts, stats)."""
+    cached = {} if refresh else cache.fresh(iris)
+    jobs, unsupported = plan([i for i in iris if i not in cached])
+    stats = {"links": len(iris), "cached": len(cached), "unsupported": len(unsupported),
+             "fetched": 0, "failed": 0, "requests": 0}
+    facts = dict(cached)
+    errors = stats["errors"] = Counter()
+    if offline or not jobs:
+        return facts, stats
+
+    pool = HttpPool(limit, rate, timeout, endpoints)
+
+    async def run(fetch, arg):
+        try:
+            results = await fetch(pool, arg)
+        except (OSError, HttpError, ValueError, KeyError) as e:
+            stats["failed"] += len(arg) if isinstance(arg, list) else 1
+            errors[str(e) or type(e).__name__] += 1
+            return
+        cache.store(results)
+        stats["fetched"] += len(results)
+        facts.update({iri: data for iri, (_, data) in results.items()})
+
+    with span("enrich_fetch", jobs=len(jobs)):
+        await asyncio.gather(*(run(fetch, arg) for fetch, arg in jobs))
+    stats["requests"] = pool.requests
+    return facts, stats
+
+# ======== Triples ========= #
+
+def collect_links(source):
+    """owl:sameAs and foaf:page object IRIs, in first-seen order, from a CSV directory or RDF file."""
+    links = {}
+
+    def add(triple):
+        if triple[1] in LINKS and isinstance(triple[2], URIRef):
+            links.setdefault(str(triple[2]))
+
+    if os.path.isdir(source):
+        convert_all(add, source)
+    else:
+        from xml_convert import TripleStream
+        TripleStream(add).parse(source, format="nt" if source.endswith(".nt") else "turtle")
+    return list(links)
+
+def enrichment_triples(facts, add):
+    for iri, data in facts.items():
+        if not data:
+            continue
+        s = URIRef(iri)
+        if data.get("label"):
+            add((s, NS["rdfs"]["label"], Literal(data["label"], lang="en")))
+        if data.get("description"):
+            add((s, NS["schema"]["description"], Literal(data["description"], lang="en")))
+        for alias in data.get("aliases", []):
+            add((s, NS["skos"]["altLabel"], Literal(alias, lang="en")))
+        for qid in data.get("types", []):
+            add((s, NS["schema"]["additionalType"], URIRef(WIKIDATA_ENTITY + qid)))
+
+def parse_endpoints(values):
+    endpoints = {}
+    for value in values:
+        host, sep, base = value.partition("=")
+        if not sep or not base.startswith(("http://", "https://")):
+            raise SystemExit(f"--endpoint expects HOST=URL, got {value!r}")
+        endpoints[host] = base
+    return endpoints
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch labels and descriptions for the graph's Wikidata and fandom links.")
+    parser.add_argument("source", nargs="?", help="CSV directory or RDF file with the links (default: the CSV tables)")
+    parser.add_argument("-o", "--output", default="enrichment.ttl")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="requests in flight at once (default: 8)")
+    parser.add_argument("--rate", type=float, default=5.0, help="requests started per second, 0 for no limit (default: 5)")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds per request (default: 30)")
+    parser.add_argument("--ttl", type=float, default=7, help="days before a cached result is fetched again (default: 7)")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"SQLite cache file (default: {CACHE_PATH})")
+    parser.add_argument("--endpoint", action="append", default=[], metavar="HOST=URL",
+                        help="send requests for HOST to URL instead, e.g. www.wikidata.org=http://127.0.0.1:8000")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cache and fetch everything")
+    parser.add_argument("--offline", action="store_true", help="use cached results only")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    iris = collect_links(args.source or default_data_dir())
+    cache = FactCache(args.cache, args.ttl * 86400)
+    try:
+        facts, stats = asyncio.run(enrich(iris, cache, args.concurrency, args.rate, args.timeout,
+                                          parse_endpoints(args.endpoint), args.refresh, args.offline))
+    finally:
+        cache.close()
+
+    g = init_graph()
+    enrichment_triples(facts, g.add)
+    g.serialize(destination=args.output, format="turtle")
+    print(f"{stats['links']} links: {stats['cached']} cached, {stats['fetched']} fetched, "
+          f"{stats['failed']} failed, {stats['unsupported']} unsupported; "
+          f"{stats['requests']} requests")
+    for error, n in stats.get("errors", Counter()).most_common(3):
+        print(f"  {n} x {error}")
+    print(f"{len(g)} triples written to {args.output} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,345 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from functools import lru_cache
+from html import escape
+from rdflib import URIRef, Literal, RDF
+from rdf_convert import NS
+from instrument import span
+from buildtools import file_hash, load_manifest, save_manifest, outdated, pool_map, guarded
+
+# ======== Entity Pages ========= #
+#
+# One static page per sp: resource of the master graph, with its properties,
+# the resources pointing at it and the same data as embedded JSON-LD. The graph
+# is streamed once into per-subject views (plain dicts); each view is hashed
+# together with the template and this script, and only pages whose hash changed
+# since the last run are handed to the worker pool; an unchanged graph file is
+# not parsed at all. The page template is split into literal and field parts
+# once per process.
+
+OUT_DIR = "entities"
+MANIFEST = ".pages_manifest.json"
+SP = str(NS["sp"])
+TYPE = str(RDF.type)
+LABELS = [NS["rdfs"]["label"], NS["foaf"]["name"], NS["schema"]["name"], NS["dcterms"]["title"]]
+
+TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+
+<head>
+  <meta charset="utf-8">
+  <meta content="width=device-width, initial-scale=1.0" name="viewport">
+  <title>LODbob-omb - {{title}}</title>
+  <link href="../assets/img/favicon.png" rel="icon">
+  <link href="../assets/vendor/bootstrap/css/bootstrap.min.css" rel="stylesheet">
+  <link href="../assets/css/main.css" rel="stylesheet">
+  <script type="application/ld+json">
+{{jsonld}}
+  </script>
+</head>
+
+<body class="starter-page-page">
+  <main class="main">
+
+    <div class="page-title dark-background">
+      <div class="container position-relative">
+        <h1>{{title}}</h1>
+        <p class="paragraph"><code>{{iri}}</code> {{types}}</p>
+        <nav class="breadcrumbs">
+          <ol>
+            <li><a href="../index.html">Home</a></li>
+            <li><a href="index.html">Entities</a></li>
+            <li class="current">{{title}}</li>
+          </ol>
+        </nav>
+      </div>
+    </div>
+
+    <section class="section">
+      <div class="container">
+        <h2>Properties</h2>
+        <table class="table">
+{{properties}}
+        </table>
+        <h2>Referenced by</h2>
+        <table class="table">
+{{references}}
+        </table>
+      </div>
+    </section>
+
+  </main>
+</body>
+
+</html>
+"""
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+
+<head>
+  <meta charset="utf-8">
+  <title>LODbob-omb - Entities</title>
+  <link href="../assets/vendor/bootstrap/css/bootstrap.min.css" rel="stylesheet">
+  <link href="../assets/css/main.css" rel="stylesheet">
+</head>
+
+<body>
+  <main class="main">
+    <section class="section">
+      <div class="container">
+        <h1>Entities</h1>
+{{sections}}
+      </div>
+    </section>
+  </main>
+</body>
+
+</html>
+"""
+
+# ======== Template ========= #
+
+FIELD = re.compile(r"\{\{(\w+)\}\}")
+
+def compile_template(text):
+    # "a {{x}} b" -> ["a ", "x", " b"]: odd positions are field names
+    return FIELD.split(text)
+
+def fill(parts, values):
+    return "".join(values[p] if i % 2 else p for i, p in enumerate(parts))
+
+# Parsed templates by path; pool workers fill theirs in their initializer
+_templates = {}
+
+def template(path=None):
+    parts = _templates.get(path)
+    if parts is None:
+        if path:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        else:
+            text = TEMPLATE
+        parts = _templates[path] = compile_template(text)
+    return parts
+
+# ======== Views ========= #
+
+@lru_cache(maxsize=None)
+def curie(iri):
+    # Longest matching namespace wins (rdf: and rdfs: share a prefix)
+    best = max((str(ns) for ns in NS.values() if iri.startswith(str(ns))), key=len, default=None)
+    if best is None:
+        return iri
+    prefix = next(p for p, ns in NS.items() if str(ns) == best)
+    return f"{prefix}:{iri[len(best):]}"
+
+@lru_cache(maxsize=None)
+def page_name(iri):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", iri[len(SP):]) + ".html"
+
+def term_value(o, labels):
+    """JSON-friendly form of an object: IRIs with label and page link, literals with lang/datatype."""
+    if isinstance(o, Literal):
+        value = {"value": str(o)}
+        if o.language:
+            value["lang"] = o.language
+        elif o.datatype:
+            value["datatype"] = str(o.datatype)
+        return value
+    iri = str(o)
+    value = {"iri": iri, "label": labels.get(iri, curie(iri))}
+    if iri.startswith(SP):
+        value["page"] = page_name(iri)
+    return value
+
+def build_views(triples):
+    """{page name: view} for every sp: subject, from one pass over the triples."""
+    out = defaultdict(list)
+    inc = defaultdict(list)
+    labels = {}
+    rank = {str(p): i for i, p in enumerate(LABELS)}
+    label_rank = {}
+    for s, p, o in triples:
+        if not isinstance(s, URIRef):
+            continue
+        s, pred = str(s), str(p)
+        out[s].append((pred, o))
+        if isinstance(o, URIRef):
+            inc[str(o)].append((s, pred))
+        elif pred in rank and rank[pred] < label_rank.get(s, len(rank)):
+            labels[s], label_rank[s] = str(o), rank[pred]
+
+    views = {}
+    for s, edges in out.items():
+        if not s.startswith(SP):
+            continue
+        props = defaultdict(list)
+        for pred, o in edges:
+            props[pred].append(term_value(o, labels))
+        for values in props.values():
+            values.sort(key=lambda v: (v.get("iri", ""), v.get("value", ""), v.get("lang", ""), v.get("datatype", "")))
+        views[page_name(s)] = {
+            "iri": s,
+            "label": labels.get(s, s[len(SP):]),
+            "types": sorted(curie(str(o)) for pred, o in edges if pred == TYPE),
+            "properties": [[pred, props[pred]] for pred in sorted(props, key=curie)],
+            "references": sorted({(labels.get(src, curie(src)), page_name(src) if src.startswith(SP) else "",
+                                   src, curie(pred)) for src, pred in inc.get(s, [])}),
+        }
+    return views
+
+def view_key(view, template_text, code):
+    # Views are built in a fixed order, so their JSON is stable without sort_keys
+    return hashlib.sha1((code + template_text + json.dumps(view, separators=(",", ":"))).encode("utf-8")).hexdigest()
+
+# ======== Rendering ========= #
+
+def jsonld(view):
+    doc = {"@context": {p: str(ns) for p, ns in NS.items()}, "@id": view["iri"]}
+    if view["types"]:
+        doc["@type"] = view["types"]
+    for pred, values in view["properties"]:
+        if pred == TYPE:
+            continue
+        items = []
+        for v in values:
+            if "iri" in v:
+                items.append({"@id": v["iri"]})
+            elif "lang" in v:
+                items.append({"@value": v["value"], "@language": v["lang"]})
+            elif "datatype" in v:
+                items.append({"@value": v["value"], "@type": v["datatype"]})
+            else:
+                items.append(v["value"])
+        doc[curie(pred)] = items if len(items) > 1 else items[0]
+    # Keep "</script>" inside a string from ending the script element
+    return json.dumps(doc, indent=2, ensure_ascii=False).replace("</", "<\\/")
+
+def value_html(v):
+    if "iri" not in v:
+        return escape(v["value"])
+    href = v.get("page", v["iri"])
+    return f'<a href="{escape(href)}">{escape(v["label"])}</a>'
+
+def render_page(view, parts):
+    rows = [f"          <tr><th>{escape(curie(pred))}</th><td>{'<br>'.join(value_html(v) for v in values)}</td></tr>"
+            for pred, values in view["properties"]]
+    refs = [f'          <tr><td><a href="{escape(page or src)}">{escape(label)}</a></td><td>{escape(pred)}</td></tr>'
+            for label, page, src, pred in view["references"]]
+    return fill(parts, {
+        "title": escape(view["label"]),
+        "iri": escape(view["iri"]),
+        "types": escape(", ".join(view["types"])),
+        "properties": "\n".join(rows),
+        "references": "\n".join(refs) or "          <tr><td>None</td></tr>",
+        "jsonld": jsonld(view),
+    })
+
+def write_page(path, view, template_path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(render_page(view, template(template_path)))
+
+def write_index(out_dir, views):
+    by_type = defaultdict(list)
+    for name, view in views.items():
+        for t in view["types"] or ["(untyped)"]:
+            by_type[t].append((view["label"], name))
+    sections = []
+    for t in sorted(by_type):
+        items = "\n".join(f'          <li><a href="{escape(name)}">{escape(label)}</a></li>'
+                          for label, name in sorted(by_type[t]))
+        sections.append(f"        <h2>{escape(t)}</h2>\n        <ul>\n{items}\n        </ul>")
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(fill(compile_template(INDEX_TEMPLATE), {"sections": "\n".join(sections)}))
+
+# ======== Incremental Builds ========= #
+
+def load_triples(source):
+    from xml_convert import TripleStream
+    triples = []
+    with span("parse", source=source) as s:
+        TripleStream(triples.append).parse(source, format="nt" if source.endswith(".nt") else "turtle")
+        s.count("triples", len(triples))
+    return triples
+
+def source_key(source, template_text, code):
+    return file_hash(source) + "/" + hashlib.sha1((code + template_text).encode("utf-8")).hexdigest()
+
+def generate(source, out_dir=OUT_DIR, template_path=None, jobs=1, force=False):
+    """Render changed entity pages and drop pages of removed subjects. Returns (rendered, skipped, removed, failed)."""
+    if template_path:
+        with open(template_path, encoding="utf-8") as f:
+            template_text = f.read()
+    else:
+        template_text = TEMPLATE
+    os.makedirs(out_dir, exist_ok=True)
+    mpath = os.path.join(out_dir, MANIFEST)
+    manifest = load_manifest(mpath)
+    pages = manifest.setdefault("pages", {})
+
+    # Same graph, template and renderer as last time: nothing to parse
+    code = file_hash(__file__)
+    fingerprint = source_key(source, template_text, code)
+    if (not force and manifest.get("source") == fingerprint
+            and all(os.path.exists(os.path.join(out_dir, name)) for name in [*pages, "index.html"])):
+        return 0, len(pages), 0, 0
+    manifest.pop("source", None)
+
+    with span("build_views"):
+        views = build_views(load_triples(source))
+
+    todo, keys = [], {}
+    for name, view in views.items():
+        keys[name] = view_key(view, template_text, code)
+        path = os.path.join(out_dir, name)
+        if outdated(pages, name, keys[name], path, force):
+            todo.append((write_page, (path, view, template_path)))
+
+    removed = 0
+    for name in set(pages) - set(views):
+        if os.path.exists(os.path.join(out_dir, name)):
+            os.remove(os.path.join(out_dir, name))
+        del pages[name]
+        removed += 1
+
+    rendered = failed = 0
+    try:
+        with span("render_pages", pages=len(todo)):
+            results = pool_map(guarded, todo, jobs, initializer=template, initargs=(template_path,))
+            for (_, (path, _, _)), (_, error) in zip(todo, results):
+                name = os.path.basename(path)
+                if error:
+                    print(f"Rendering failed for {name}: {error}")
+                    failed += 1
+                else:
+                    pages[name] = keys[name]
+                    rendered += 1
+        if rendered or removed or not os.path.exists(os.path.join(out_dir, "index.html")):
+            write_index(out_dir, views)
+        if not failed:
+            manifest["source"] = fingerprint
+    finally:
+        save_manifest(mpath, manifest)
+    return rendered, len(views) - len(todo), removed, failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate one HTML page with embedded JSON-LD per resource of the master graph.")
+    parser.add_argument("source", nargs="?", default="scott_pilgrim_master.ttl", help="Turtle or N-Triples graph")
+    parser.add_argument("-o", "--out-dir", default=OUT_DIR, help=f"output directory (default: {OUT_DIR})")
+    parser.add_argument("--template", help="HTML template with {{title}}, {{iri}}, {{types}}, {{properties}}, {{references}} and {{jsonld}} fields")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N", help="render in N worker processes (0 = one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render every page")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rendered, skipped, removed, failed = generate(args.source, args.out_dir, args.template, args.jobs or None, args.force)
+    print(f"Rendered {rendered}, unchanged {skipped}, removed {removed}, failed {failed} "
+          f"in {time.perf_counter() - start:.2f}s ({args.out_dir})")
+    if failed:
+        raise SystemExit(1)
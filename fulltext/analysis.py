@@ -1,57 +1,168 @@
+import argparse
+import glob
+import json
 import os
+import sys
 import string
 from collections import Counter
+from functools import lru_cache
 from lxml import html
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.sentiment import SentimentIntensityAnalyzer
+from nltk_resources import ensure
+from sentiment_cache import default_cache, aggregate
+from tei_stream import tei_blocks
+import repo_path  # noqa: F401 (puts the repository root on sys.path)
+from instrument import span
+from buildtools import pool_map
 
-# Download updated NLTK resources
-nltk.download('punkt')
-nltk.download('punkt_tab')
-nltk.download('stopwords')
-nltk.download('vader_lexicon')
+# NLTK and VADER are imported on first use, so startup only pays for lxml.
+# VADER itself lives behind the score cache in sentiment_cache.py.
+
+@lru_cache(maxsize=None)
+def stop_words():
+    ensure('stopwords')
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
+
+@lru_cache(maxsize=None)
+def tokenizer():
+    ensure('punkt', 'punkt_tab')
+    from nltk.tokenize import word_tokenize
+    return word_tokenize
 
 class TextAnalyzer:
     def __init__(self, file_path):
         self.file_path = file_path
         self.raw_text = ""
+        self.utterances = []
         self.filtered_tokens = []
 
     def extract_and_tokenize(self):
-        # Extract script content from the specific div
-        with open(self.file_path, "r", encoding="utf-8") as f:
-            tree = html.fromstring(f.read())
-        
-        self.raw_text = " ".join(tree.xpath('//div[@class="script-content"]//text()')).strip()
+        if self.file_path.endswith(".xml"):
+            # TEI source: streamed directly, no XSLT render needed
+            with span("tei_parse", file=self.file_path):
+                blocks = list(tei_blocks(self.file_path))
+                self.raw_text = " ".join(text for _, text in blocks)
+        else:
+            # Extract script content from the specific div
+            with span("html_parse", file=self.file_path):
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    tree = html.fromstring(f.read())
+                
+                self.raw_text = " ".join(tree.xpath('//div[@class="script-content"]//text()')).strip()
+                blocks = [(el.get("class"), el.text_content())
+                          for el in tree.xpath('//div[@class="script-content"]//*[@class]')]
+
+        # Sentiment units: headings, directions and dialogue (speaker labels carry no sentiment)
+        self.utterances = [" ".join(t.split()) for kind, t in blocks
+                           if kind in ("head", "scene-head", "stage", "dialogue") and t.strip()]
         
         # Tokenization and cleaning
-        tokens = word_tokenize(self.raw_text.lower())
-        stop_words = set(stopwords.words('english'))
-        self.filtered_tokens = [w for w in tokens if w.isalnum() and w not in stop_words]
+        with span("tokenize") as s:
+            tokens = tokenizer()(self.raw_text.lower())
+            stops = stop_words()
+            self.filtered_tokens = [w for w in tokens if w.isalnum() and w not in stops]
+            s.count("tokens_produced", len(tokens))
+            s.count("tokens_kept", len(self.filtered_tokens))
+
+    def keyword_counts(self):
+        return Counter(self.filtered_tokens)
+
+    def sentiment(self):
+        # Word-weighted mean of cached per-utterance VADER scores
+        with span("vader") as s:
+            cache = default_cache()
+            before = cache.misses
+            scores = aggregate(self.utterances, cache.scores(self.utterances))
+            s.count("texts_scored", cache.misses - before)
+            s.count("cache_hits", len(self.utterances) - (cache.misses - before))
+        return scores
 
     def get_frequencies(self, top_n=10):
         # Display frequency distribution
-        counts = Counter(self.filtered_tokens)
+        counts = self.keyword_counts()
         print(f"\nTop {top_n} Keywords:")
         for word, count in counts.most_common(top_n):
             print(f"{word}: {count}")
 
     def run_sentiment(self):
-        # Calculate sentiment polarity
-        sia = SentimentIntensityAnalyzer()
-        scores = sia.polarity_scores(self.raw_text)
-        print(f"\nSentiment Scores: {scores}")
+        print(f"\nSentiment Scores: {self.sentiment()}")
+
+# ======== Corpus Batch Mode ========= #
+
+def find_files(target):
+    """Script files under a directory (recursively), or matching a glob pattern, sorted.
+
+    A directory yields its TEI (.xml) sources, or its rendered .html when it
+    holds no TEI, so a scene is never counted twice.
+    """
+    if os.path.isdir(target):
+        for ext in ("*.xml", "*.html"):
+            paths = find_files(os.path.join(target, "**", ext))
+            if paths:
+                return paths
+        return []
+    return sorted(p for p in glob.glob(target, recursive=True) if os.path.isfile(p))
+
+def warm_worker():
+    # Pool initializer: each worker builds its tokenizer and stopwords once
+    # (VADER is loaded by the sentiment cache only if a score is missing)
+    tokenizer()
+    stop_words()
+
+def analyze_file(path):
+    """Returns (path, keyword Counter, sentiment scores) for one scene file."""
+    analyzer = TextAnalyzer(path)
+    analyzer.extract_and_tokenize()
+    return path, analyzer.keyword_counts(), analyzer.sentiment()
+
+def analyze_corpus(paths, out, jobs=1, top_n=10):
+    """Analyze paths across `jobs` processes, writing one JSON line per file then a merged line.
+
+    Lines are written in input order as results arrive; returns the merged record.
+    """
+    merged = Counter()
+    totals = Counter()
+    n = 0
+
+    def write(record):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    for path, counts, scores in pool_map(analyze_file, paths, jobs, initializer=warm_worker):
+        write({"file": path, "tokens": sum(counts.values()),
+               "keywords": counts.most_common(top_n), "sentiment": scores})
+        merged.update(counts)
+        totals.update(scores)
+        n += 1
+
+    # Corpus sentiment is the mean of the per-file scores
+    record = {"file": None, "files": n, "tokens": sum(merged.values()),
+              "keywords": merged.most_common(top_n),
+              "sentiment": {k: round(v / n, 4) for k, v in totals.items()} if n else {}}
+    write(record)
+    return record
 
 if __name__ == "__main__":
-    # Pointing to the file inside the fulltext folder
-    target_file = os.path.join("fulltext", "scott_scene.html")
-    
-    if os.path.exists(target_file):
-        analyzer = TextAnalyzer(target_file)
+    parser = argparse.ArgumentParser(description="Keyword frequencies and VADER sentiment for screenplay TEI or HTML.")
+    parser.add_argument("target", nargs="?", default=os.path.join("fulltext", "script.xml"),
+                        help="a TEI or HTML file, a directory of them, or a glob (quote it)")
+    parser.add_argument("-o", "--output", help="write JSON Lines here ('-' for stdout); implied for directories and globs")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N", help="analyze files in N worker processes (0 = one per CPU)")
+    parser.add_argument("--top", type=int, default=10, help="keywords per record (default: 10)")
+    args = parser.parse_args()
+
+    if os.path.isfile(args.target) and not args.output:
+        # Single scene: the original human-readable report
+        analyzer = TextAnalyzer(args.target)
         analyzer.extract_and_tokenize()
-        analyzer.get_frequencies(10)
+        analyzer.get_frequencies(args.top)
         analyzer.run_sentiment()
     else:
-        print(f"Error: {target_file} not found.")
\ No newline at end of file
+        paths = find_files(args.target)
+        if not paths:
+            sys.exit(f"Error: no script files found for {args.target}")
+        if args.output in (None, "-"):
+            analyze_corpus(paths, sys.stdout, args.jobs or None, args.top)
+        else:
+            with open(args.output, "w", encoding="utf-8") as out:
+                analyze_corpus(paths, out, args.jobs or None, args.top)
\ No newline at end of file
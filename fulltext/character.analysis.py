@@ -1,34 +1,129 @@
 import os
-from lxml import html
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-import pandas as pd
-
-# Ensure VADER is ready
-nltk.download('vader_lexicon')
-
-def analyze_character_vibes(html_path):
-    with open(html_path, "r", encoding="utf-8") as f:
-        tree = html.fromstring(f.read())
-
-    sia = SentimentIntensityAnalyzer()
-    
-    # List of characters we want to analyze based on your TEI IDs
-    characters = ["SCOTT", "LUCAS LEE", "RAMONA", "WALLACE"]
+import sys
+from lxml import etree, html
+from sentiment_cache import default_cache, aggregate
+from tei_stream import iter_tei
+import repo_path  # noqa: F401 (puts the repository root on sys.path)
+from instrument import span
+
+TEI_NS = "{http://www.tei-c.org/ns/1.0}"
+XML_ID = "{http://www.w3.org/XML/1998/namespace}id"
+
+def speaker_key(label):
+    # "SCOTT (cont’d)" and "SCOTT" are the same speaker
+    return label.split("(")[0].strip().upper()
+
+def load_cast(tei_path):
+    """Cast from the TEI particDesc: returns ({person id: name}, {speaker label: person id}).
+
+    Labels come from each <sp who="#id"><speaker> so the HTML speaker spans
+    can be mapped back to a person without a per-character query.
+    """
+    cast, labels = {}, {}
+    tree = etree.parse(tei_path)
+    for el in tree.iter(TEI_NS + "person", TEI_NS + "sp"):
+        if el.tag == TEI_NS + "person":
+            name = el.findtext(TEI_NS + "persName") or el.get(XML_ID)
+            cast[el.get(XML_ID)] = " ".join(name.split())
+        else:
+            who = (el.get("who") or "").lstrip("#")
+            label = el.findtext(TEI_NS + "speaker")
+            if who and label:
+                labels.setdefault(speaker_key(label), who)
+    return cast, labels
+
+def index_speakers(tree):
+    """One walk over the script spans.
+
+    Returns ({speaker label: [utterance, ...]}, dialogue words, action words).
+    Dialogue belongs to the most recent speaker span, so every paragraph of
+    a multi-paragraph speech is kept.
+    """
+    utterances = {}
+    current = None
+    diag_len = act_len = 0
+    for el in tree.iter("span"):
+        cls = el.get("class")
+        if cls == "speaker":
+            current = utterances.setdefault(speaker_key(el.text_content()), [])
+        elif cls == "dialogue":
+            text = el.text_content()
+            diag_len += len(text.split())
+            if current is not None:
+                current.append(text)
+        elif cls == "stage":
+            act_len += len(el.text_content().split())
+    return utterances, diag_len, act_len
+
+def index_tei(tei_path):
+    """One streaming pass over a TEI script.
+
+    Returns ({person id: name}, {person id: [utterance, ...]}, dialogue words, action words).
+    Speeches without a who attribute are keyed by their speaker label.
+    """
+    cast, by_person = {}, {}
+    diag_len = act_len = 0
+    for record in iter_tei(tei_path):
+        kind = record[0]
+        if kind == "person":
+            cast[record[1]] = record[2]
+        elif kind == "speech":
+            _, who, label, paragraphs = record[:4]
+            by_person.setdefault(who or speaker_key(label), []).extend(paragraphs)
+            diag_len += sum(len(p.split()) for p in paragraphs)
+        elif kind == "stage":
+            act_len += len(record[1].split())
+    return cast, by_person, diag_len, act_len
+
+def index_html(html_path, tei_path=None):
+    # Rendered HTML: speakers are mapped back to persons through the TEI when it is available
+    with span("html_parse", file=html_path):
+        with open(html_path, "r", encoding="utf-8") as f:
+            tree = html.fromstring(f.read())
+
+    cast, labels = {}, {}
+    if tei_path and os.path.exists(tei_path):
+        with span("tei_cast", file=tei_path):
+            cast, labels = load_cast(tei_path)
+
+    utterances, diag_len, act_len = index_speakers(tree)
+    by_person = {}
+    for label, lines in utterances.items():
+        by_person.setdefault(labels.get(label, label), []).extend(lines)
+    return cast, by_person, diag_len, act_len
+
+def analyze_character_vibes(path, tei_path=None):
+    """Per-character VADER sentiment and scene rhythm for a TEI script (or its rendered HTML)."""
+    with span("speaker_index", file=path) as s:
+        if path.endswith(".xml"):
+            cast, by_person, diag_len, act_len = index_tei(path)
+        else:
+            cast, by_person, diag_len, act_len = index_html(path, tei_path)
+        s.count("utterances", sum(len(u) for u in by_person.values()))
+        s.count("tokens_produced", diag_len + act_len)
+
+    # Cast order first, then any speakers the cast list does not name
+    order = [pid for pid in cast if pid in by_person] + [k for k in by_person if k not in cast]
+
+    # Every utterance is scored (or read from the cache) in one batch
+    with span("vader") as s:
+        utterances = [u for pid in order for u in by_person[pid] if u.strip()]
+        cache = default_cache()
+        scores = dict(zip(utterances, cache.scores(utterances)))
+        s.count("texts_scored", cache.misses)
+        s.count("cache_hits", cache.hits)
+
     results = []
 
     print(f"{'Character':<15} | {'Sentiment':<10} | {'Vibe'}")
     print("-" * 40)
 
-    for char in characters:
-        # Extract dialogue specifically for this speaker
-        # Using XPath to find the speaker span and the immediately following dialogue span
-        dialogues = tree.xpath(f"//span[@class='speaker' and text()='{char}']/following-sibling::span[@class='dialogue'][1]/text()")
-        
-        full_text = " ".join(dialogues)
+    for pid in order:
+        char = cast.get(pid, pid)
+        lines = [u for u in by_person[pid] if u.strip()]
         
-        if full_text.strip():
-            score = sia.polarity_scores(full_text)['compound']
+        if lines:
+            score = aggregate(lines, [scores[u] for u in lines])['compound']
             
             # Categorize the 'vibe'
             if score > 0.1: vibe = "Positive/Excited"
@@ -39,20 +134,15 @@ def analyze_character_vibes(html_path):
             print(f"{char:<15} | {score:>10.4f} | {vibe}")
 
     # Bonus: Action vs Dialogue Ratio
-    all_dialogue = tree.xpath("//span[@class='dialogue']/text()")
-    all_actions = tree.xpath("//span[@class='stage']/text()")
-    
-    diag_len = sum(len(d.split()) for d in all_dialogue)
-    act_len = sum(len(a.split()) for a in all_actions)
-    
     print("\n--- Scene Rhythm ---")
     print(f"Total Words in Dialogue: {diag_len}")
     print(f"Total Words in Action: {act_len}")
     print(f"Action Density: {(act_len / (diag_len + act_len)) * 100:.1f}%")
+    return results
 
 if __name__ == "__main__":
-    target = os.path.join("fulltext", "scott_scene.html")
-    if os.path.exists(target):
-        analyze_character_vibes(target)
-    else:
-        print("Error: HTML file not found.")
\ No newline at end of file
+    # TEI source by default; pass the rendered HTML to analyze that instead
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join("fulltext", "script.xml")
+    if not os.path.exists(target):
+        sys.exit(f"Error: {target} not found.")
+    analyze_character_vibes(target, os.path.join(os.path.dirname(target), "script.xml"))
\ No newline at end of file
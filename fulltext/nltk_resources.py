@@ -0,0 +1,80 @@
+import os
+import sys
+
+# ======== NLTK Resource Bootstrap ========= #
+#
+# The analyzers used to call nltk.download() on every run. Resources now live
+# in one data directory ($NLTK_DATA, else ~/nltk_data) and are fetched at
+# most once; after that a stamp file lets later runs skip the lookups entirely.
+# On offline hosts, run `python fulltext/nltk_resources.py` once where there is
+# network access and copy the directory over, or set SP_OFFLINE=1 to fail fast.
+
+DATA_DIR = os.environ.get("NLTK_DATA", "").split(os.pathsep)[0] or os.path.join(os.path.expanduser("~"), "nltk_data")
+STAMP = ".sp_resources"
+
+# Download id -> path checked by nltk.data.find
+RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+    "vader_lexicon": "sentiment/vader_lexicon.zip",
+}
+
+_ready = set()
+
+def _stamped():
+    try:
+        with open(os.path.join(DATA_DIR, STAMP), encoding="utf-8") as f:
+            return set(f.read().split())
+    except OSError:
+        return set()
+
+def _stamp(names):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(os.path.join(DATA_DIR, STAMP), "w", encoding="utf-8") as f:
+        f.write("\n".join(sorted(names)) + "\n")
+
+def ensure(*names):
+    """Make the named NLTK resources loadable, downloading only what is missing.
+
+    Imports nltk (slow) only on the first call, and only downloads when the
+    data directory does not already hold the resource.
+    """
+    import nltk
+
+    if DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, DATA_DIR)
+
+    wanted = [n for n in names if n not in _ready]
+    if not wanted:
+        return
+    stamped = _stamped()
+    missing = []
+    for name in wanted:
+        if name in stamped:
+            continue
+        try:
+            nltk.data.find(RESOURCES[name])
+        except LookupError:
+            missing.append(name)
+
+    if missing:
+        if os.environ.get("SP_OFFLINE"):
+            raise LookupError(f"NLTK resources missing from {DATA_DIR}: {', '.join(missing)} "
+                              "(run fulltext/nltk_resources.py on a networked host)")
+        for name in missing:
+            if not nltk.download(name, download_dir=DATA_DIR, quiet=True):
+                raise LookupError(f"Could not download NLTK resource '{name}' into {DATA_DIR}")
+
+    _ready.update(wanted)
+    if not set(wanted) <= stamped:
+        try:
+            _stamp(stamped | set(wanted))
+        except OSError:
+            pass  # read-only data dir: lookups just run again next time
+
+if __name__ == "__main__":
+    # Fetch everything up front, e.g. before moving to an offline host
+    names = sys.argv[1:] or list(RESOURCES)
+    ensure(*names)
+    print(f"NLTK resources ready in {DATA_DIR}: {', '.join(names)}")
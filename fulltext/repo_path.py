@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The fulltext scripts run as `python fulltext/<script>.py`, which only puts
+# fulltext/ on sys.path. Importing this module adds the repository root too,
+# where the shared instrument and buildtools modules live.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,136 @@
+import hashlib
+import math
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from importlib import metadata
+from nltk_resources import DATA_DIR, ensure
+
+# ======== VADER Score Cache ========= #
+#
+# Sentiment is scored per utterance and kept in SQLite, keyed by a hash of the
+# text and of the lexicon, so rerunning the analyzers on an unchanged corpus
+# reads scores back instead of loading VADER. Character and scene scores are
+# combined from their utterances by aggregate(). Least recently used rows are evicted
+# once the table passes max_rows.
+
+CACHE_PATH = os.environ.get("SP_SENTIMENT_CACHE", os.path.join(".build_cache", "sentiment.sqlite"))
+FIELDS = ("neg", "neu", "pos", "compound")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    key BLOB PRIMARY KEY,
+    neg REAL, neu REAL, pos REAL, compound REAL,
+    used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scores_used ON scores (used);
+"""
+
+@lru_cache(maxsize=None)
+def sentiment_analyzer():
+    # VADER (and nltk with it) is imported only when a text actually has to be scored
+    ensure("vader_lexicon")
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+def lexicon_version():
+    """Hash of the VADER lexicon file plus the nltk version that scores with it."""
+    path = os.path.join(DATA_DIR, "sentiment", "vader_lexicon.zip")
+    if not os.path.exists(path):
+        ensure("vader_lexicon")
+        import nltk
+        path = nltk.data.find("sentiment/vader_lexicon.zip").path
+    h = hashlib.sha1(metadata.version("nltk").encode())
+    with open(path, "rb") as f:
+        h.update(f.read())
+    return h.digest()
+
+class SentimentCache:
+    """polarity_scores() for many texts at once, computing only the ones not cached."""
+
+    def __init__(self, path=CACHE_PATH, max_rows=200000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.max_rows = max_rows
+        self.version = lexicon_version()
+        self.hits = self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha1(self.version + text.encode("utf-8")).digest()
+
+    def scores(self, texts):
+        keys = [self.key(t) for t in texts]
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):  # stay under SQLite's parameter limit
+            batch = unique[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, neg, neu, pos, compound FROM scores WHERE key IN ({','.join('?' * len(batch))})", batch)
+            for key, *values in rows:
+                found[key] = dict(zip(FIELDS, values))
+
+        now = time.time()
+        new = []
+        for key, text in zip(keys, texts):
+            if key not in found:
+                scores = sentiment_analyzer().polarity_scores(text)
+                found[key] = {f: scores[f] for f in FIELDS}
+                new.append((key, *found[key].values(), now))
+        self.misses += len(new)
+        self.hits += len(keys) - len(new)
+
+        computed = {row[0] for row in new}
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany("UPDATE scores SET used = ? WHERE key = ?",
+                                  [(now, k) for k in unique if k not in computed])
+            self.conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)", new)
+            if new:
+                self.evict()
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [found[k] for k in keys]
+
+    def evict(self):
+        excess = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_rows
+        if excess > 0:
+            self.conn.execute("DELETE FROM scores WHERE key IN "
+                              "(SELECT key FROM scores ORDER BY used LIMIT ?)", (excess,))
+
+    def close(self):
+        self.conn.close()
+
+@lru_cache(maxsize=None)
+def default_cache():
+    # One connection per process; pool workers each open their own
+    return SentimentCache()
+
+# VADER's compound is x / sqrt(x*x + ALPHA) of the summed word valences x
+ALPHA = 15
+
+def valence(compound):
+    # Inverse of the normalization; compound is rounded, so stay off +-1
+    c = max(-0.9999, min(0.9999, compound))
+    return c * math.sqrt(ALPHA / (1 - c * c))
+
+def aggregate(texts, scores):
+    """Combine per-utterance scores into one score for all of them.
+
+    neg/neu/pos are word-weighted means. The compound re-normalizes the sum of
+    the utterances' valences, as VADER does for a single text, so a character
+    with many mildly negative lines still comes out clearly negative.
+    """
+    weights = [len(t.split()) for t in texts]
+    total = sum(weights)
+    if not total:
+        return {f: 0.0 for f in FIELDS}
+    result = {f: round(sum(w * s[f] for w, s in zip(weights, scores)) / total, 4) for f in FIELDS[:3]}
+    x = sum(valence(s["compound"]) for s in scores)
+    result["compound"] = round(x / math.sqrt(x * x + ALPHA), 4)
+    return result
@@ -0,0 +1,99 @@
+from lxml import etree
+
+# ======== Streaming TEI Reader ========= #
+#
+# Reads screenplay TEI with iterparse and yields one record per block, so the
+# analyzers work from the encoded structure (<sp who>, <speaker>, <stage>)
+# instead of the rendered HTML. Finished elements are cleared and dropped from
+# their parent, which keeps memory flat however long the script is.
+#
+#   ("person", id, name, sameAs)                cast entry from particDesc
+#   ("scene", n)                                start of a <div type="scene">
+#   ("head", text)                              scene heading
+#   ("stage", text, {attributes}, [name refs])  stage direction, including ones inside a speech
+#   ("speech", who, label, [paragraphs], [name refs])
+#
+# who is a person id without "#"; name refs are the raw @ref values of <name>
+# elements inside the block. Consumers index records, so fields are only ever
+# appended.
+
+TEI = "{http://www.tei-c.org/ns/1.0}"
+XML_ID = "{http://www.w3.org/XML/1998/namespace}id"
+
+PERSON, HEAD, STAGE, SP = TEI + "person", TEI + "head", TEI + "stage", TEI + "sp"
+SPEAKER, P, DIV, NAME = TEI + "speaker", TEI + "p", TEI + "div", TEI + "name"
+
+def clean(text):
+    return " ".join(text.split())
+
+def name_refs(el):
+    return [n.get("ref") for n in el.iter(NAME) if n.get("ref")]
+
+def speech_text(el, stages):
+    # Text of el without nested stage directions, which are collected into stages
+    parts = [el.text or ""]
+    for child in el:
+        if child.tag == STAGE:
+            stages.append((clean("".join(child.itertext())), dict(child.attrib), name_refs(child)))
+        elif isinstance(child.tag, str):
+            parts.append(speech_text(child, stages))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+def release(el):
+    # Free the element and everything parsed before it at the same level
+    el.clear(keep_tail=True)
+    parent = el.getparent()
+    if parent is not None:
+        while el.getprevious() is not None:
+            del parent[0]
+
+def iter_tei(source):
+    """Yield person/scene/head/stage/speech records from a TEI file in document order."""
+    for event, el in etree.iterparse(source, events=("start", "end"), tag=(PERSON, DIV, HEAD, STAGE, SP),
+                                     remove_comments=True):
+        if event == "start":
+            if el.tag == DIV and el.get("type") == "scene":
+                yield "scene", el.get("n")
+            continue
+        if el.tag == DIV:
+            pass  # its blocks are already out
+        elif el.tag == PERSON:
+            name = el.findtext(TEI + "persName") or el.get(XML_ID)
+            yield "person", el.get(XML_ID), clean(name), el.get("sameAs")
+        elif el.tag == SP:
+            stages, paragraphs, label = [], [], ""
+            for child in el:
+                if child.tag == SPEAKER:
+                    label = clean("".join(child.itertext()))
+                elif child.tag == P:
+                    paragraphs.append(clean(speech_text(child, stages)))
+                elif child.tag == STAGE:
+                    stages.append((clean("".join(child.itertext())), dict(child.attrib), name_refs(child)))
+            for text, attrs, refs in stages:
+                yield "stage", text, attrs, refs
+            refs = [r for p in el.iter(P) for r in name_refs(p)]
+            yield "speech", (el.get("who") or "").lstrip("#"), label, paragraphs, refs
+        elif next(el.iterancestors(SP), None) is not None:
+            continue  # handled with its speech
+        elif el.tag == HEAD:
+            yield "head", clean("".join(el.itertext()))
+        else:
+            yield "stage", clean("".join(el.itertext())), dict(el.attrib), name_refs(el)
+        release(el)
+
+def tei_blocks(source):
+    """Yield (kind, text) for every block of script text: head, stage, speaker, dialogue."""
+    for record in iter_tei(source):
+        kind = record[0]
+        if kind == "speech":
+            if record[2]:
+                yield "speaker", record[2]
+            for text in record[3]:
+                yield "dialogue", text
+        elif kind in ("head", "stage") and record[1]:
+            yield kind, record[1]
+
+def tei_text(source):
+    """All script text (headings, directions, speaker labels, dialogue) joined by spaces."""
+    return " ".join(text for _, text in tei_blocks(source))
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import sys
+from analysis import tokenizer, stop_words
+from tei_stream import iter_tei
+import repo_path  # noqa: F401 (puts the repository root on sys.path)
+from instrument import span
+
+# NumPy/SciPy are only needed here, not by the other fulltext scripts
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+# ======== Term-Document Matrix ========= #
+#
+# Every scene and every speaker is a row of one sparse count matrix (documents
+# x terms). Each text block is tokenized once; TF, TF-IDF and keyword queries
+# are then matrix operations over all documents instead of a Counter per file.
+
+SCENE, SPEAKER = "scene", "speaker"
+
+class TermMatrix:
+    """Sparse counts with row labels docs [(kind, name), ...] and column labels terms."""
+
+    def __init__(self, docs, terms, counts):
+        self.docs = docs
+        self.terms = np.asarray(terms, dtype=str)
+        self.counts = counts.tocsr()
+
+    @classmethod
+    def build(cls, sources):
+        """Tokenize TEI sources into scene rows and speaker rows.
+
+        Scenes hold headings, stage directions and dialogue; speakers hold their
+        dialogue only, merged across sources by person id.
+        """
+        if np is None:
+            raise ImportError("term_matrix needs numpy and scipy (pip install numpy scipy)")
+        tokenize, stops = tokenizer(), stop_words()
+        vocab, docs, names = {}, {}, {}
+        rows, cols = [], []
+
+        def add(text, *targets):
+            # Tokenized once, however many documents the block counts towards
+            terms = [vocab.setdefault(w, len(vocab)) for w in tokenize(text.lower())
+                     if w.isalnum() and w not in stops]
+            for doc in targets:
+                rows.extend([docs.setdefault(doc, len(docs))] * len(terms))
+                cols.extend(terms)
+
+        for source in sources:
+            with span("term_matrix_tokenize", file=source):
+                base = os.path.splitext(os.path.basename(source))[0]
+                scene = (SCENE, base)
+                for record in iter_tei(source):
+                    kind = record[0]
+                    if kind == "person":
+                        names[record[1]] = record[2]
+                    elif kind == "scene":
+                        scene = (SCENE, f"{base}#{record[1]}")
+                    elif kind in ("head", "stage"):
+                        add(record[1], scene)
+                    elif kind == "speech":
+                        _, who, label, paragraphs = record[:4]
+                        for text in paragraphs:
+                            add(text, scene, (SPEAKER, who or label))
+
+        # Speaker rows are labelled with the cast name where the TEI gives one
+        labels = [(kind, names.get(name, name) if kind == SPEAKER else name) for kind, name in docs]
+        counts = sparse.coo_matrix((np.ones(len(rows), dtype=np.float64), (rows, cols)),
+                                   shape=(len(docs), len(vocab)))
+        counts.sum_duplicates()
+        return cls(labels, list(vocab), counts)
+
+    # ---- Weightings ---- #
+
+    def tf(self):
+        # Counts divided by each document's length
+        lengths = np.asarray(self.counts.sum(axis=1)).ravel()
+        return sparse.diags(1 / np.maximum(lengths, 1)) @ self.counts
+
+    def idf(self, rows=None):
+        # Smoothed idf, log((1 + N) / (1 + df)) + 1, over all rows or a subset
+        counts = self.counts if rows is None else self.counts[rows]
+        df = np.diff(counts.tocsc().indptr)
+        return np.log((1 + counts.shape[0]) / (1 + df)) + 1
+
+    def tfidf(self, kind=None):
+        """L2-normalized TF-IDF rows; with kind, idf is computed over that kind of document only."""
+        rows = None if kind is None else [i for i, d in enumerate(self.docs) if d[0] == kind]
+        weights = self.tf() @ sparse.diags(self.idf(rows))
+        norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+        return (sparse.diags(1 / np.maximum(norms, 1e-12)) @ weights).tocsr()
+
+    # ---- Keyword Queries ---- #
+
+    def top_terms(self, matrix, row, n=10):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        values, cols = matrix.data[start:end], matrix.indices[start:end]
+        order = np.lexsort((self.terms[cols], -values))[:n]
+        return [(str(self.terms[cols[i]]), round(float(values[i]), 4)) for i in order]
+
+    def distinctive(self, kind=None, n=10):
+        """{doc: [(term, tf-idf), ...]} for every document (of one kind)."""
+        weights = self.tfidf(kind)
+        return {doc: self.top_terms(weights, i, n) for i, doc in enumerate(self.docs)
+                if kind is None or doc[0] == kind}
+
+    def frequencies(self, kind=SCENE, n=10):
+        """Corpus-wide top terms by count, summed over one kind of document."""
+        mask = np.array([d[0] == kind for d in self.docs])
+        totals = np.asarray(self.counts[mask].sum(axis=0)).ravel()
+        order = np.lexsort((self.terms, -totals))[:n]
+        return [(str(self.terms[i]), int(totals[i])) for i in order if totals[i]]
+
+    def similarity(self, kind=SCENE):
+        """Cosine similarity between all documents of one kind (dense, docs x docs)."""
+        rows = [i for i, d in enumerate(self.docs) if d[0] == kind]
+        weights = self.tfidf(kind)[rows]
+        return [self.docs[i] for i in rows], (weights @ weights.T).toarray()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distinctive TF-IDF keywords per scene and per speaker.")
+    parser.add_argument("sources", nargs="*", default=[os.path.join("fulltext", "script.xml")], help="TEI files")
+    parser.add_argument("--by", choices=[SCENE, SPEAKER], default=SPEAKER, help="documents to compare (default: speaker)")
+    parser.add_argument("--top", type=int, default=10, help="keywords per document (default: 10)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    tm = TermMatrix.build(args.sources)
+    with span("tfidf"):
+        result = tm.distinctive(args.by, args.top)
+    if args.json:
+        json.dump({name: terms for (_, name), terms in result.items()}, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print(f"{len(tm.docs)} documents, {len(tm.terms)} terms, {tm.counts.nnz} non-zero counts")
+        print(f"\nTop {args.top} {args.by} keywords: {', '.join(t for t, _ in tm.frequencies(args.by, args.top))}")
+        for (_, name), terms in result.items():
+            print(f"\n{name}: {', '.join(f'{t} ({w})' for t, w in terms)}")
@@ -1,5 +1,10 @@
+import argparse
 import os
+import sys
 from lxml import etree
+import repo_path  # noqa: F401 (puts the repository root on sys.path)
+from instrument import span
+from buildtools import file_hash, load_manifest, save_manifest, outdated, pool_map, guarded
 
 # Path configuration
 base_folder = "fulltext"
@@ -7,31 +12,110 @@ xml_filename = os.path.join(base_folder, "script.xml")
 xsl_filename = os.path.join(base_folder, "scriptstyle.xsl")
 output_filename = os.path.join(base_folder, "scott_scene.html")
 
-def main():
-    if not os.path.exists(xml_filename):
-        print(f"Error: {xml_filename} not found.")
-        return
-    if not os.path.exists(xsl_filename):
-        print(f"Error: {xsl_filename} not found.")
-        return
+MANIFEST = ".render_manifest.json"
+
+# ======== Stylesheet ========= #
+
+# Compiled once per process (per worker under -j) and reused for every file
+_stylesheets = {}
+
+def stylesheet(xsl_path):
+    transform = _stylesheets.get(xsl_path)
+    if transform is None:
+        with span("xslt_compile", file=xsl_path):
+            transform = _stylesheets[xsl_path] = etree.XSLT(etree.parse(xsl_path))
+    return transform
+
+def render(xml_path, xsl_path, out_path):
+    """Render one TEI file to HTML; returns bytes written."""
+    with span("xml_parse", file=xml_path):
+        dom = etree.parse(xml_path)
+
+    # Apply transformation
+    with span("xslt"):
+        new_dom = stylesheet(xsl_path)(dom)
+
+    # Write output
+    with span("write_html") as s:
+        html_bytes = etree.tostring(new_dom, pretty_print=True, method="html")
+        with open(out_path, "wb") as f:
+            f.write(html_bytes)
+        s.count("bytes_written", len(html_bytes))
+    return len(html_bytes)
 
+
+# ======== Incremental Builds ========= #
+
+def render_all(pairs, xsl_path, jobs=1, force=False):
+    """Render (source, output) pairs whose source or stylesheet changed since the last build.
+
+    Hashes are kept in a manifest beside each output. Returns (rendered, skipped, failed).
+    """
+    xsl_hash = file_hash(xsl_path)
+    manifests = {}
+    todo, skipped = [], 0
+    for src, out in pairs:
+        mpath = os.path.join(os.path.dirname(out) or ".", MANIFEST)
+        manifest = manifests.setdefault(mpath, load_manifest(mpath))
+        key = {"source": file_hash(src), "stylesheet": xsl_hash}
+        name = os.path.basename(out)
+        if not outdated(manifest, name, key, out, force):
+            skipped += 1
+            continue
+        todo.append(((render, (src, xsl_path, out)), mpath, name, key))
+
+    batch = [t[0] for t in todo]
+    results = pool_map(guarded, batch, jobs, initializer=stylesheet, initargs=(xsl_path,))
+    rendered = failed = 0
     try:
-        # Load XML and XSLT
-        dom = etree.parse(xml_filename)
-        xslt = etree.parse(xsl_filename)
+        for ((_, (src, _, _)), mpath, name, key), (_, error) in zip(todo, results):
+            if error:
+                print(f"Transformation failed for {src}: {error}")
+                failed += 1
+            else:
+                manifests[mpath][name] = key
+                rendered += 1
+    finally:
+        for mpath, manifest in manifests.items():
+            save_manifest(mpath, manifest)
+    return rendered, skipped, failed
+
+def output_pairs(sources, out_dir=None):
+    # script.xml -> <out_dir or source dir>/script.html
+    pairs = []
+    for src in sources:
+        stem = os.path.splitext(os.path.basename(src))[0]
+        pairs.append((src, os.path.join(out_dir or os.path.dirname(src), stem + ".html")))
+    return pairs
+
+def main():
+    """Returns the exit status: 1 when an input is missing or a render failed."""
+    parser = argparse.ArgumentParser(description="Render TEI screenplay files to HTML with scriptstyle.xsl.")
+    parser.add_argument("sources", nargs="*", help=f"TEI files (default: {xml_filename} -> {output_filename})")
+    parser.add_argument("-o", "--out-dir", help="write NAME.html here instead of next to each source")
+    parser.add_argument("--xsl", default=xsl_filename, help=f"stylesheet (default: {xsl_filename})")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N", help="render in N worker processes (0 = one per CPU)")
+    parser.add_argument("--force", action="store_true", help="re-render even when source and stylesheet are unchanged")
+    args = parser.parse_args()
 
-        # Apply transformation
-        transform = etree.XSLT(xslt)
-        new_dom = transform(dom)
+    if args.sources:
+        pairs = output_pairs(args.sources, args.out_dir)
+    else:
+        pairs = [(xml_filename, os.path.join(args.out_dir, "scott_scene.html") if args.out_dir else output_filename)]
 
-        # Write output
-        with open(output_filename, "wb") as f:
-            f.write(etree.tostring(new_dom, pretty_print=True, method="html"))
-        
-        print(f"Success! Created: {output_filename}")
+    for path in [args.xsl] + [src for src, _ in pairs]:
+        if not os.path.exists(path):
+            print(f"Error: {path} not found.")
+            return 1
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
 
-    except Exception as e:
-        print(f"Transformation failed: {e}")
+    rendered, skipped, failed = render_all(pairs, args.xsl, args.jobs or None, args.force)
+    if len(pairs) == 1 and rendered:
+        print(f"Success! Created: {pairs[0][1]}")
+    else:
+        print(f"Rendered {rendered}, unchanged {skipped}, failed {failed}.")
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
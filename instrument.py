@@ -0,0 +1,152 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# ======== Stage Instrumentation ========= #
+#
+# Timed spans with counters, shared by the conversion and analysis scripts.
+# Off unless SP_INSTRUMENT is set, in which case a JSON report is written at exit:
+#
+#   SP_INSTRUMENT=report.json python rdf_convert.py      (use "-" for stderr)
+#   SP_PROFILE=cprofile,tracemalloc                       (optional, slower)
+#
+# With cprofile the raw stats also go to <report>.prof for pstats/snakeviz.
+
+REPORT = os.environ.get("SP_INSTRUMENT", "")
+PROFILE = {p.strip() for p in os.environ.get("SP_PROFILE", "").split(",") if p.strip()}
+ENABLED = bool(REPORT)
+
+STARTED = time.perf_counter()
+spans = []
+counters = defaultdict(int)
+_lock = threading.Lock()
+_local = threading.local()  # per-thread stack of open spans
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def _add(table, name, n):
+    with _lock:
+        table[name] += n
+
+class Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.counters = defaultdict(int)
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _stack().pop()
+        spans.append({
+            "name": self.name,
+            "parent": self.parent,
+            "start": round(self.start - STARTED, 6),
+            "seconds": round(seconds, 6),
+            "thread": threading.current_thread().name,
+            "counters": dict(self.counters),
+            **({"attrs": self.attrs} if self.attrs else {}),
+        })
+        return False
+
+    def count(self, name, n=1):
+        _add(self.counters, name, n)
+        _add(counters, name, n)
+
+class _NullSpan:
+    # Returned when instrumentation is off: no timing, no allocation per call
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, name, n=1):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+def span(name, **attrs):
+    """Time a stage: `with span("csv_read", file=name) as s: ... s.count("rows_read", n)`."""
+    if not ENABLED:
+        return NULL_SPAN
+    return Span(name, attrs)
+
+def count(name, n=1):
+    # Counter outside (or in addition to) any span; also credited to the innermost span
+    if ENABLED:
+        stack = _stack()
+        if stack:
+            stack[-1].count(name, n)
+        else:
+            _add(counters, name, n)
+
+# ======== Profiling & Report ========= #
+
+_profiler = None
+if ENABLED and "cprofile" in PROFILE:
+    import cProfile
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+if ENABLED and "tracemalloc" in PROFILE:
+    import tracemalloc
+    tracemalloc.start()
+
+def build_report():
+    report = {
+        "script": os.path.basename(sys.argv[0]) if sys.argv else "",
+        "argv": sys.argv[1:],
+        "total_seconds": round(time.perf_counter() - STARTED, 6),
+        "counters": dict(counters),
+        "spans": spans,
+    }
+    if _profiler is not None:
+        import pstats
+        _profiler.disable()
+        stats = pstats.Stats(_profiler)
+        top = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:25]
+        report["cprofile_top"] = [
+            {"function": f"{path}:{line}({func})", "calls": nc, "total_seconds": round(tt, 6), "cumulative_seconds": round(ct, 6)}
+            for (path, line, func), (cc, nc, tt, ct, callers) in top
+        ]
+        if REPORT != "-":
+            stats.dump_stats(REPORT + ".prof")
+    if "tracemalloc" in PROFILE:
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        report["tracemalloc"] = {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"where": str(stat.traceback), "bytes": stat.size, "blocks": stat.count}
+                for stat in tracemalloc.take_snapshot().statistics("lineno")[:15]
+            ],
+        }
+    return report
+
+def write_report():
+    report = build_report()
+    if REPORT == "-":
+        json.dump(report, sys.stderr, indent=2)
+        sys.stderr.write("\n")
+    else:
+        with open(REPORT, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if ENABLED:
+    atexit.register(write_report)
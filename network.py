@@ -0,0 +1,215 @@
+import argparse
+import os
+import time
+from rdf_convert import NS, MAPPINGS, DATA_DIR, convert_file
+
+# NumPy is only needed here, not by the conversion scripts
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ======== Character Network ========= #
+#
+# The relationship predicates of RLTNS.csv compiled into compressed sparse rows:
+# nodes get dense integer ids, and each node's out-edges are one contiguous
+# slice of `indices` (its predicates the same slice of `preds`). The reverse
+# direction is a second CSR, so degree, BFS, PageRank and components are array
+# operations over all nodes at once rather than walks over an rdflib Graph.
+
+RELATIONS = [
+    NS["rel"]["lifePartnerOf"], NS["rel"]["friendOf"], NS["rel"]["ambivalentOf"],
+    NS["rel"]["antagonistOf"], NS["rel"]["livesWith"], NS["org"]["memberOf"],
+]
+
+class CSR:
+    """Rows of (neighbor, predicate id) for nodes 0..n-1."""
+
+    def __init__(self, n, src, dst, preds):
+        order = np.argsort(src, kind="stable")
+        self.indices = dst[order]
+        self.preds = preds[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def row(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def expand(self, frontier):
+        """All (neighbor, from) pairs of the frontier nodes, as two arrays."""
+        starts, ends = self.indptr[frontier], self.indptr[frontier + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return self.indices[offsets], np.repeat(frontier, lengths)
+
+class Network:
+    """Directed multigraph over the relationship predicates, with integer node ids."""
+
+    def __init__(self, edges, predicates=RELATIONS):
+        if np is None:
+            raise ImportError("network needs numpy (pip install numpy)")
+        self.predicates = [str(p) for p in predicates]
+        pred_ids = {p: i for i, p in enumerate(self.predicates)}
+        self.ids = {}
+        src, dst, preds = [], [], []
+        for s, p, o in edges:
+            pid = pred_ids.get(str(p))
+            if pid is None:
+                continue
+            src.append(self.ids.setdefault(str(s), len(self.ids)))
+            dst.append(self.ids.setdefault(str(o), len(self.ids)))
+            preds.append(pid)
+        self.nodes = list(self.ids)
+        n = len(self.nodes)
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        pred_arr = np.asarray(preds, dtype=np.int16)
+        self.out = CSR(n, self.src, self.dst, pred_arr)
+        self.inc = CSR(n, self.dst, self.src, pred_arr)
+        # Both directions in one CSR, for undirected traversals
+        self.both = CSR(n, np.concatenate([self.src, self.dst]), np.concatenate([self.dst, self.src]),
+                        np.concatenate([pred_arr, pred_arr]))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def edge_count(self):
+        return len(self.src)
+
+    def __contains__(self, name):
+        try:
+            self.node_id(name)
+        except KeyError:
+            return False
+        return True
+
+    def node_id(self, name):
+        # Accepts a full IRI or a bare sp: id such as "char_scott_pilgrim"
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids.get(str(NS["sp"][name.replace("local:", "")]))
+        if i is None:
+            raise KeyError(f"{name} is not in the network")
+        return i
+
+    def label(self, i):
+        node = self.nodes[i]
+        return node[len(str(NS["sp"])):] if node.startswith(str(NS["sp"])) else node
+
+    # ---- Metrics ---- #
+
+    def degree(self, direction="both"):
+        """Edge count per node: "out", "in" or "both"."""
+        return {"out": self.out, "in": self.inc, "both": self.both}[direction].degree()
+
+    def bfs(self, source, directed=False):
+        """Hop distance from source to every node (-1 if unreachable) and the BFS parent array."""
+        csr = self.out if directed else self.both
+        n = len(self.nodes)
+        dist = np.full(n, -1, dtype=np.int64)
+        parent = np.full(n, -1, dtype=np.int64)
+        frontier = np.array([source], dtype=np.int64)
+        dist[source] = 0
+        level = 0
+        while frontier.size:
+            level += 1
+            nbrs, origin = csr.expand(frontier)
+            fresh = dist[nbrs] < 0
+            nbrs, origin = nbrs[fresh], origin[fresh]
+            nbrs, first = np.unique(nbrs, return_index=True)  # one parent per newly reached node
+            dist[nbrs] = level
+            parent[nbrs] = origin[first]
+            frontier = nbrs
+        return dist, parent
+
+    def shortest_path(self, a, b, directed=False):
+        """Node ids of one shortest path from a to b, or [] if there is none."""
+        dist, parent = self.bfs(a, directed)
+        if dist[b] < 0:
+            return []
+        path = [b]
+        while path[-1] != a:
+            path.append(int(parent[path[-1]]))
+        return path[::-1]
+
+    def pagerank(self, damping=0.85, tol=1e-10, max_iter=100):
+        """PageRank over directed edges; rank of dangling nodes is spread evenly."""
+        n = len(self.nodes)
+        if not n:
+            return np.zeros(0)
+        out_deg = self.out.degree().astype(np.float64)
+        dangling = out_deg == 0
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            share = np.where(dangling, 0.0, rank / np.maximum(out_deg, 1))
+            new = np.bincount(self.dst, weights=share[self.src], minlength=n)
+            new = damping * (new + rank[dangling].sum() / n) + (1 - damping) / n
+            done = np.abs(new - rank).sum() < tol
+            rank = new
+            if done:
+                break
+        return rank
+
+    def components(self):
+        """Weakly connected component label per node (the smallest node id in it)."""
+        labels = np.arange(len(self.nodes), dtype=np.int64)
+        while True:
+            new = labels.copy()
+            np.minimum.at(new, self.src, labels[self.dst])
+            np.minimum.at(new, self.dst, labels[self.src])
+            new = new[new]  # pointer jumping: follow labels to their own label
+            if np.array_equal(new, labels):
+                return labels
+            labels = new
+
+    def top(self, values, k=10):
+        order = np.lexsort((np.arange(len(values)), -values))[:k]
+        return [(self.label(i), values[i].item()) for i in order]
+
+# ======== Loading ========= #
+
+def relationship_edges(path):
+    """(s, p, o) relationship triples straight from a CSV table or an RDF file."""
+    triples = []
+    if path.endswith(".csv"):
+        convert_file(path, MAPPINGS["RLTNS.csv"], triples.append)
+    else:
+        from xml_convert import TripleStream
+        fmt = "nt" if path.endswith(".nt") else "turtle"
+        TripleStream(triples.append).parse(path, format=fmt)
+    return triples
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Degree, paths, PageRank and components of the character network.")
+    parser.add_argument("source", nargs="?", default=os.path.join(DATA_DIR, "RLTNS.csv"),
+                        help="RLTNS.csv or an RDF file (.ttl/.nt) holding the relationship triples")
+    parser.add_argument("--top", type=int, default=10, help="nodes to list per metric (default: 10)")
+    parser.add_argument("--path", nargs=2, metavar=("FROM", "TO"), help="shortest path between two ids, e.g. char_scott_pilgrim char_envy_adams")
+    parser.add_argument("--directed", action="store_true", help="follow edges only in their direction for --path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    net = Network(relationship_edges(args.source))
+    print(f"{len(net)} nodes, {net.edge_count} edges (built in {time.perf_counter() - start:.3f}s)")
+
+    if args.path:
+        unknown = [name for name in args.path if name not in net]
+        if unknown:
+            parser.error(f"not in the network: {', '.join(unknown)}")
+        path = net.shortest_path(net.node_id(args.path[0]), net.node_id(args.path[1]), args.directed)
+        print(" -> ".join(net.label(i) for i in path) if path else "No path.")
+    else:
+        print(f"\nTop {args.top} by degree:")
+        for name, value in net.top(net.degree(), args.top):
+            print(f"  {name:<40} {value}")
+        print(f"\nTop {args.top} by PageRank:")
+        for name, value in net.top(net.pagerank(), args.top):
+            print(f"  {name:<40} {value:.4f}")
+        labels = net.components()
+        sizes = np.bincount(labels)
+        sizes = np.sort(sizes[sizes > 0])[::-1]
+        print(f"\n{len(sizes)} connected component(s), largest: {', '.join(map(str, sizes[:5]))}")
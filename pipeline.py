@@ -0,0 +1,178 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from buildtools import file_hash, load_manifest, save_manifest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MANIFEST = os.path.join(".build_cache", "pipeline.json")
+REPORTS = "build"
+
+# ======== Stages ========= #
+#
+# Each stage is a script with declared inputs (globs) and outputs, relative to
+# the repository root. A stage depends on whichever stages produce its inputs,
+# so the RDF branch and the fulltext branch run side by side. A stage is
+# skipped when its command and the contents of its inputs match the last
+# successful run and its outputs still exist.
+
+Stage = namedtuple("Stage", "name command inputs outputs stdout", defaults=(None,))
+
+FULLTEXT_CODE = ["instrument.py", "buildtools.py", "fulltext/*.py"]
+
+STAGES = [
+    Stage("rdf",
+          ["rdf_convert.py", "--data", "csvs", "--tei", "fulltext/script.xml", "-o", "scott_pilgrim_master.ttl"],
+          ["rdf_convert.py", "tei_convert.py", "instrument.py", "buildtools.py", "csvs/*.csv",
+           "fulltext/tei_stream.py", "fulltext/script.xml"],
+          ["scott_pilgrim_master.ttl"]),
+    Stage("xml",
+          ["xml_convert.py", "scott_pilgrim_master.ttl", "scott_pilgrim_master.xml"],
+          ["xml_convert.py", "snapshot.py", "scott_pilgrim_master.ttl"],
+          ["scott_pilgrim_master.xml"]),
+    Stage("pages",
+          ["entity_pages.py", "scott_pilgrim_master.ttl", "-o", "entities"],
+          ["entity_pages.py", "buildtools.py", "rdf_convert.py", "xml_convert.py", "instrument.py", "scott_pilgrim_master.ttl"],
+          ["entities/index.html"]),
+    Stage("transform",
+          ["fulltext/transform.py"],
+          FULLTEXT_CODE + ["fulltext/script.xml", "fulltext/scriptstyle.xsl"],
+          ["fulltext/scott_scene.html"]),
+    Stage("analysis",
+          ["fulltext/analysis.py", "fulltext/script.xml", "-o", f"{REPORTS}/analysis.jsonl"],
+          FULLTEXT_CODE + ["fulltext/script.xml"],
+          [f"{REPORTS}/analysis.jsonl"]),
+    Stage("characters",
+          ["fulltext/character.analysis.py", "fulltext/script.xml"],
+          FULLTEXT_CODE + ["fulltext/script.xml"],
+          [f"{REPORTS}/characters.txt"],
+          stdout=f"{REPORTS}/characters.txt"),
+]
+
+def dependencies(stages):
+    """{stage name: set of stage names producing one of its inputs}."""
+    producers = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: {producers[i] for i in s.inputs if i in producers and producers[i] != s.name}
+            for s in stages}
+
+def select(stages, targets):
+    # The named stages plus everything upstream of them
+    deps = dependencies(stages)
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in stages if s.name in wanted]
+
+# ======== Change Detection ========= #
+
+def fingerprint(stage):
+    """Hash of the command and every input file's name and contents (None if an input is missing)."""
+    h = hashlib.sha256(json.dumps(stage.command).encode())
+    for pattern in stage.inputs:
+        paths = sorted(glob.glob(os.path.join(ROOT, pattern)))
+        if not paths:
+            return None
+        for path in paths:
+            h.update(os.path.relpath(path, ROOT).encode() + b"\0" + file_hash(path).encode())
+    return h.hexdigest()
+
+# ======== Runner ========= #
+
+def run_stage(stage):
+    """Run one stage's script from the repository root; returns (returncode, seconds, stderr tail)."""
+    for out in stage.outputs:
+        os.makedirs(os.path.join(ROOT, os.path.dirname(out)), exist_ok=True)
+    start = time.perf_counter()
+    stdout = open(os.path.join(ROOT, stage.stdout), "wb") if stage.stdout else subprocess.DEVNULL
+    try:
+        proc = subprocess.run([sys.executable] + stage.command, cwd=ROOT, stdout=stdout, stderr=subprocess.PIPE)
+    finally:
+        if stage.stdout:
+            stdout.close()
+    err = proc.stderr.decode("utf-8", "replace").strip()
+    return proc.returncode, time.perf_counter() - start, err[-800:]
+
+def run_pipeline(stages, jobs=None, force=False, dry_run=False):
+    """Run stages in dependency order, independent ones concurrently. Returns {name: status}."""
+    deps = dependencies(stages)
+    manifest = load_manifest(os.path.join(ROOT, MANIFEST))
+    lock = threading.Lock()
+    status = {}
+
+    def execute(stage):
+        key = fingerprint(stage)
+        current = all(os.path.exists(os.path.join(ROOT, out)) for out in stage.outputs)
+        rebuilt_upstream = any(status[d] == "would run" for d in deps[stage.name])
+        if key is not None and not force and current and not rebuilt_upstream and manifest.get(stage.name) == key:
+            return "up to date", 0.0, ""
+        if dry_run:
+            return "would run", 0.0, ""
+        code, seconds, err = run_stage(stage)
+        if code != 0:
+            return f"FAILED (exit {code})", seconds, err
+        with lock:
+            manifest[stage.name] = key
+            save_manifest(os.path.join(ROOT, MANIFEST), manifest)
+        return "ran", seconds, ""
+
+    pending = {s.name: s for s in stages}
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs or len(stages) or 1) as pool:
+        while pending or running:
+            progress = True
+            while progress:
+                progress = False
+                for name, stage in list(pending.items()):
+                    upstream = deps[name]
+                    if any(status.get(d, "").startswith(("FAILED", "skipped")) for d in upstream):
+                        status[name] = "skipped (upstream failed)"
+                        print(f"{name:<12} {status[name]}")
+                    elif all(d in status for d in upstream):
+                        running[pool.submit(execute, stage)] = name
+                    else:
+                        continue
+                    del pending[name]
+                    progress = True
+            if not running:
+                if pending:
+                    raise RuntimeError(f"dependency cycle among: {', '.join(pending)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result, seconds, err = future.result()
+                status[name] = result
+                print(f"{name:<12} {result}" + (f" in {seconds:.2f}s" if seconds else ""))
+                if err:
+                    print("\n".join("    " + line for line in err.splitlines()[-10:]))
+    return status
+
+if __name__ == "__main__":
+    names = [s.name for s in STAGES]
+    parser = argparse.ArgumentParser(description="Build the knowledge graph and fulltext outputs, skipping unchanged stages.")
+    parser.add_argument("targets", nargs="*", metavar="STAGE", help=f"stages to build with their dependencies ({', '.join(names)}; default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=0, metavar="N", help="run up to N stages at once (default: all ready stages)")
+    parser.add_argument("--force", action="store_true", help="rerun stages even when their inputs are unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    args = parser.parse_args()
+
+    unknown = set(args.targets) - set(names)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    status = run_pipeline(select(STAGES, args.targets or names), args.jobs or None, args.force, args.dry_run)
+    failed = [n for n, s in status.items() if not s.startswith(("ran", "up to date", "would run"))]
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s"
+          + (f", {len(failed)} stage(s) failed or skipped: {', '.join(failed)}" if failed else "."))
+    sys.exit(1 if failed else 0)
@@ -1,680 +1,823 @@
-# ======== Base Configuration ========= #
-import csv
-import os
-from rdflib import Graph, Namespace, URIRef, Literal, RDF, XSD
-
-# All Namespaces
-NS = {
-    "sp": Namespace("https://scottpilgrim.org/resource/"),
-    "bf": Namespace("http://id.loc.gov/ontologies/bibframe/"),
-    "dcterms": Namespace("http://purl.org/dc/terms/"),
-    "foaf": Namespace("http://xmlns.com/foaf/0.1/"),
-    "gn": Namespace("http://www.geonames.org/ontology#"),
-    "owl": Namespace("http://www.w3.org/2002/07/owl#"),
-    "rdfs": Namespace("http://www.w3.org/2000/01/rdf-schema#"),
-    "schema": Namespace("https://schema.org/"),
-    "skos": Namespace("http://www.w3.org/2004/02/skos/core#"),
-    "mo": Namespace("http://purl.org/ontology/mo/"),
-    "rel": Namespace("http://purl.org/vocab/relationship/"),
-    "rdf": Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#"),
-    "org": Namespace("http://www.w3.org/ns/org#")
-}
-
-def init_graph():
-    g = Graph()
-    for prefix, ns in NS.items():
-        g.bind(prefix, ns)
-    return g
-
-g = init_graph()
-
-def get_sp_uri(val):
-    if not val: return None
-    return NS["sp"][val.replace("local:", "").strip()]
-
-# ======== INDIVIDUAL FILE PROCESSING (MANUAL) ========= #
-
-# 1. PPL.csv (Characters & Persons)
-if os.path.exists("PPL.csv"):
-    with open("PPL.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Subject definition
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                type_prefix, type_term = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[type_prefix][type_term]))
-            else:
-                # Fallback logic if rdf:type is empty
-                g.add((sub, RDF.type, NS["schema"]["FictionalCharacter"] if "char_" in row["id"] else NS["foaf"]["Person"]))
-
-            # 2. foaf:name (Literal)
-            if row.get("foaf:name"):
-                g.add((sub, NS["foaf"]["name"], Literal(row["foaf:name"])))
-
-            # 3. schema:roleName (Literal - Protagonist, Support etc.)
-            if row.get("schema:roleName"):
-                g.add((sub, NS["schema"]["roleName"], Literal(row["schema:roleName"])))
-
-            # 4. schema:portrayedBy (URI - Linked to another Person)
-            if row.get("schema:portrayedBy"):
-                g.add((sub, NS["schema"]["portrayedBy"], get_sp_uri(row["schema:portrayedBy"])))
-
-            # 5. org:memberOf (URI - Linked to a Group/Band)
-            if row.get("org:memberOf"):
-           
-                for group in row["org:memberOf"].split(';'):
-                    g.add((sub, NS["org"]["memberOf"], get_sp_uri(group)))
-
-            # 6. owl:sameAs (URIRef - Wikidata/External Links)
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-            # 7. foaf:page (URIRef - Fandom/Web pages)
-            if row.get("foaf:page"):
-                g.add((sub, NS["foaf"]["page"], URIRef(row["foaf:page"])))
-
-            # 8. dcterms:isPartOf (URI - Linked to the Universe)
-            if row.get("dcterms:isPartOf"):
-                g.add((sub, NS["dcterms"]["isPartOf"], get_sp_uri(row["dcterms:isPartOf"])))
-
-# 2. RLTNS.csv (Relationships)
-if os.path.exists("RLTNS.csv"):
-    with open("RLTNS.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-
-            sub = get_sp_uri(row.get("Subject"))
-            if not sub: 
-                continue
-
- 
-            relations = [
-                "rel:lifePartnerOf", 
-                "rel:ambivalentOf", 
-                "rel:friendOf", 
-                "rel:livesWith", 
-                "rel:antagonistOf",
-                "org:memberOf"
-            ]
-
-            for p in relations:
-                val = row.get(p)
-                if val:
-                    prefix, term = p.split(':')
-                    targets = val.split(';')
-                    for target in targets:
-                        target_uri = get_sp_uri(target)
-                        if target_uri:
-                            g.add((sub, NS[prefix][term], target_uri))
-
-# 3. ANIM.csv (Anime Series) 
-if os.path.exists("ANIM.csv"):
-    with open("ANIM.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Subject URI
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-
-            # 2. dcterms:title (Literal)
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-
-            # 3. schema:director (Literal)
-            if row.get("schema:director"):
-                g.add((sub, NS["schema"]["director"], Literal(row["schema:director"])))
-
-            # 4. schema:screenwriter 
-            if row.get("schema:screenwriter"):
-                for writer in row["schema:screenwriter"].split(';'):
-                    g.add((sub, NS["schema"]["screenwriter"], Literal(writer.strip())))
-
-            # 5. schema:productionCompany 
-            if row.get("schema:productionCompany"):
-                for company in row["schema:productionCompany"].split(';'):
-                    g.add((sub, NS["schema"]["productionCompany"], Literal(company.strip())))
-
-            # 6. schema:broadcaster
-            if row.get("schema:broadcaster"):
-                g.add((sub, NS["schema"]["broadcaster"], Literal(row["schema:broadcaster"])))
-
-            # 7. schema:datePublished
-            if row.get("schema:datePublished"):
-                g.add((sub, NS["schema"]["datePublished"], Literal(row["schema:datePublished"], datatype=XSD.gYear)))
-
-            # 8. schema:numberOfSeasons 
-            if row.get("schema:numberOfSeasons"):
-                g.add((sub, NS["schema"]["numberOfSeasons"], Literal(row["schema:numberOfSeasons"], datatype=XSD.integer)))
-
-            # 9. schema:numberOfEpisodes 
-            if row.get("schema:numberOfEpisodes"):
-                g.add((sub, NS["schema"]["numberOfEpisodes"], Literal(row["schema:numberOfEpisodes"], datatype=XSD.integer)))
-
-            # 10. schema:genre 
-            if row.get("schema:genre"):
-                for genre in row["schema:genre"].split(';'):
-                    g.add((sub, NS["schema"]["genre"], Literal(genre.strip())))
-
-            # 11. schema:isBasedOn
-            if row.get("schema:isBasedOn"):
-                g.add((sub, NS["schema"]["isBasedOn"], get_sp_uri(row["schema:isBasedOn"])))
-
-            # 12. dcterms:identifier 
-            if row.get("dcterms:identifier"):
-                g.add((sub, NS["dcterms"]["identifier"], URIRef(row["dcterms:identifier"])))
-
-# 4. CMC.csv (Comic Series) 
-if os.path.exists("CMC.csv"):
-    with open("CMC.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Subject URI
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-
-            # 2. dcterms:title (Literal)
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-
-            # 3. schema:author (Literal)
-            if row.get("schema:author"):
-                g.add((sub, NS["schema"]["author"], Literal(row["schema:author"])))
-
-            # 4. schema:publisher
-            if row.get("schema:publisher"):
-                g.add((sub, NS["schema"]["publisher"], Literal(row["schema:publisher"])))
-
-            # 5. schema:startDate (Literal - xsd:gYear)
-            if row.get("schema:startDate"):
-                g.add((sub, NS["schema"]["startDate"], Literal(row["schema:startDate"], datatype=XSD.gYear)))
-
-            # 6. schema:endDate (Literal - xsd:gYear)
-            if row.get("schema:endDate"):
-                g.add((sub, NS["schema"]["endDate"], Literal(row["schema:endDate"], datatype=XSD.gYear)))
-
-            # 7. schema:numberOfVolumes (Literal - xsd:integer)
-            if row.get("schema:numberOfVolumes"):
-                g.add((sub, NS["schema"]["numberOfVolumes"], Literal(row["schema:numberOfVolumes"], datatype=XSD.integer)))
-
-            # 8. schema:genre 
-            if row.get("schema:genre"):
-                for genre in row["schema:genre"].split(';'):
-                    g.add((sub, NS["schema"]["genre"], Literal(genre.strip())))
-
-            # 9. dcterms:identifier (URIRef - Wikidata URL)
-            if row.get("dcterms:identifier"):
-                g.add((sub, NS["dcterms"]["identifier"], URIRef(row["dcterms:identifier"])))
-
-# 5. STRCTR.csv (Soundtrack & Songs) 
-if os.path.exists("STRCTR.csv"):
-    with open("STRCTR.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            
-            sub = get_sp_uri(row.get("id") or row.get("Subject"))
-            if not sub: continue
-            
-            # 1. rdf:type
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. dcterms:title (Literal)
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-                
-            # 3. schema:producer 
-            if row.get("schema:producer"):
-                g.add((sub, NS["schema"]["producer"], Literal(row["schema:producer"])))
-                
-            # 4. schema:performer 
-            if row.get("schema:performer"):
-                for perf in row["schema:performer"].split(';'):
-                    target_uri = get_sp_uri(perf.strip())
-                    if target_uri:
-                        g.add((sub, NS["schema"]["performer"], target_uri))
-                    
-            # 5. schema:datePublished (Literal - xsd:gYear)
-            if row.get("schema:datePublished"):
-                g.add((sub, NS["schema"]["datePublished"], Literal(row["schema:datePublished"], datatype=XSD.gYear)))
-                
-            # 6. dcterms:format 
-            if row.get("dcterms:format"):
-                for fmt in row["dcterms:format"].split(';'):
-                    g.add((sub, NS["dcterms"]["format"], Literal(fmt.strip())))
-                    
-            # 7. schema:genre 
-            if row.get("schema:genre"):
-                for genre in row["schema:genre"].split(';'):
-                    g.add((sub, NS["schema"]["genre"], Literal(genre.strip())))
-                    
-            # 8. dcterms:isPartOf 
-            if row.get("dcterms:isPartOf"):
-                g.add((sub, NS["dcterms"]["isPartOf"], get_sp_uri(row["dcterms:isPartOf"])))
-                
-            # 9. owl:sameAs
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-# 6. SNDTRCK.csv (Soundtrack & Music Recordings) 
-if os.path.exists("SNDTRCK.csv"):
-    with open("SNDTRCK.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-          
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. dcterms:title (Literal)
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-                
-            # 3. schema:producer (Literal)
-            if row.get("schema:producer"):
-                g.add((sub, NS["schema"]["producer"], Literal(row["schema:producer"])))
-                
-            # 4. schema:performer 
-            if row.get("schema:performer"):
-                for perf in row["schema:performer"].split(';'):
-                    target_uri = get_sp_uri(perf.strip())
-                    if target_uri:
-                        g.add((sub, NS["schema"]["performer"], target_uri))
-                    
-            # 5. schema:datePublished (Literal - xsd:gYear)
-            if row.get("schema:datePublished"):
-                g.add((sub, NS["schema"]["datePublished"], Literal(row["schema:datePublished"], datatype=XSD.gYear)))
-                
-            # 6. dcterms:format (Literal - CD, Digital)
-            if row.get("dcterms:format"):
-                for fmt in row["dcterms:format"].split(';'):
-                    g.add((sub, NS["dcterms"]["format"], Literal(fmt.strip())))
-                    
-            # 7. schema:genre (Literal - Indie Rock, Punk)
-            if row.get("schema:genre"):
-                for genre in row["schema:genre"].split(';'):
-                    g.add((sub, NS["schema"]["genre"], Literal(genre.strip())))
-                    
-            # 8. dcterms:isPartOf 
-            if row.get("dcterms:isPartOf"):
-                g.add((sub, NS["dcterms"]["isPartOf"], get_sp_uri(row["dcterms:isPartOf"])))
-                
-            # 9. owl:sameAs 
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-# 7. GTR.csv (Guitars & Instruments) 
-if os.path.exists("GTR.csv"):
-    with open("GTR.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type (mo:Instrument)
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. foaf:name 
-            if row.get("foaf:name"):
-                g.add((sub, NS["foaf"]["name"], Literal(row["foaf:name"])))
-
-            # 3. dcterms:description (Literal)
-            if row.get("dcterms:description"):
-                g.add((sub, NS["dcterms"]["description"], Literal(row["dcterms:description"])))
-
-            # 4. schema:ownedBy 
-            if row.get("schema:ownedBy"):
-                g.add((sub, NS["schema"]["ownedBy"], get_sp_uri(row["schema:ownedBy"])))
-
-            # 5. schema:brand 
-            if row.get("schema:brand"):
-                g.add((sub, NS["schema"]["brand"], Literal(row["schema:brand"])))
-
-            # 6. schema:productionDate 
-            if row.get("schema:productionDate"):
-                g.add((sub, NS["schema"]["productionDate"], Literal(row["schema:productionDate"])))
-
-            # 7. schema:material 
-            if row.get("schema:material"):
-                for material in row["schema:material"].split(';'):
-                    g.add((sub, NS["schema"]["material"], Literal(material.strip())))
-
-            # 8. schema:color 
-            if row.get("schema:color"):
-                g.add((sub, NS["schema"]["color"], Literal(row["schema:color"])))
-
-            # 9. owl:sameAs (URIRef - Wikidata link)
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-# 8. CSLM.csv (Landmarks & Locations)
-if os.path.exists("CSLM.csv"):
-    with open("CSLM.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-        
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type (schema:LandmarksOrHistoricalBuildings)
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. foaf:name 
-            if row.get("foaf:name"):
-                g.add((sub, NS["foaf"]["name"], Literal(row["foaf:name"])))
-
-            # 3. dcterms:description 
-            if row.get("dcterms:description"):
-                g.add((sub, NS["dcterms"]["description"], Literal(row["dcterms:description"])))
-
-            # 4. schema:address 
-            if row.get("schema:address"):
-                g.add((sub, NS["schema"]["address"], Literal(row["schema:address"])))
-
-            # 5. schema:architect 
-            if row.get("schema:architect"):
-                g.add((sub, NS["schema"]["architect"], Literal(row["schema:architect"])))
-
-            # 6. schema:dateCreated 
-            if row.get("schema:dateCreated"):
-                g.add((sub, NS["schema"]["dateCreated"], Literal(row["schema:dateCreated"])))
-
-            # 7. dcterms:isPartOf 
-            if row.get("dcterms:isPartOf"):
-                g.add((sub, NS["dcterms"]["isPartOf"], get_sp_uri(row["dcterms:isPartOf"])))
-
-            # 8. owl:sameAs 
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-# 9. GRPS.csv (Groups & Organizations)
-if os.path.exists("GRPS.csv"):
-    with open("GRPS.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-           
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. foaf:name 
-            if row.get("foaf:name"):
-                g.add((sub, NS["foaf"]["name"], Literal(row["foaf:name"])))
-
-            # 3. dcterms:description 
-            if row.get("dcterms:description"):
-                g.add((sub, NS["dcterms"]["description"], Literal(row["dcterms:description"])))
-
-            # 4. owl:sameAs 
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-# 10. PLMTR.csv (Plumtree & Inspirations)
-if os.path.exists("PLMTR.csv"):
-    with open("PLMTR.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-           
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. dcterms:title (Literal)
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-
-            # 3. mo:performer (
-            if row.get("mo:performer"):
-                g.add((sub, NS["mo"]["performer"], URIRef(row["mo:performer"])))
-
-            # 4. mo:genre 
-            if row.get("mo:genre"):
-                g.add((sub, NS["mo"]["genre"], Literal(row["mo:genre"])))
-
-            # 5. dcterms:issued (Literal - xsd:gYear)
-            if row.get("dcterms:issued"):
-                g.add((sub, NS["dcterms"]["issued"], Literal(row["dcterms:issued"], datatype=XSD.gYear)))
-
-            # 6. dcterms:medium 
-            if row.get("dcterms:medium"):
-                g.add((sub, NS["dcterms"]["medium"], Literal(row["dcterms:medium"])))
-
-            # 7. dcterms:extent 
-            if row.get("dcterms:extent"):
-                g.add((sub, NS["dcterms"]["extent"], Literal(row["dcterms:extent"])))
-
-            # 8. mo:publisher (Literal - Cinnamon Toast Records)
-            if row.get("mo:publisher"):
-                g.add((sub, NS["mo"]["publisher"], Literal(row["mo:publisher"])))
-
-            # 9. dcterms:description (Literal)
-            if row.get("dcterms:description"):
-                g.add((sub, NS["dcterms"]["description"], Literal(row["dcterms:description"])))
-
-            # 10. dcterms:isPartOf 
-            if row.get("dcterms:isPartOf"):
-                g.add((sub, NS["dcterms"]["isPartOf"], get_sp_uri(row["dcterms:isPartOf"])))
-
-            # 11. owl:sameAs 
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-# 11. SCTT_MV.csv (Movie Details)
-if os.path.exists("SCTT_MV.csv"):
-    with open("SCTT_MV.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                g.add((sub, RDF.type, URIRef(row["rdf:type"])))
-            
-            # 2. dcterms:title (Literal)
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-                
-            # 3. schema:director 
-            if row.get("schema:director"):
-                g.add((sub, NS["schema"]["director"], URIRef(row["schema:director"])))
-                
-            # 4. schema:actor 
-            if row.get("schema:actor"):
-                for actor_url in row["schema:actor"].split(';'):
-                    g.add((sub, NS["schema"]["actor"], URIRef(actor_url.strip())))
-                    
-            # 5. schema:datePublished (Literal - xsd:gYear)
-            if row.get("schema:datePublished"):
-                g.add((sub, NS["schema"]["datePublished"], Literal(row["schema:datePublished"], datatype=XSD.gYear)))
-                
-            # 6. schema:isBasedOn 
-            if row.get("schema:isBasedOn"):
-                g.add((sub, NS["schema"]["isBasedOn"], get_sp_uri(row["schema:isBasedOn"])))
-                
-            # 7. schema:locationCreated 
-            if row.get("schema:locationCreated"):
-                g.add((sub, NS["schema"]["locationCreated"], get_sp_uri(row["schema:locationCreated"])))
-                
-            # 8. schema:musicBy 
-            if row.get("schema:musicBy"):
-                g.add((sub, NS["schema"]["musicBy"], get_sp_uri(row["schema:musicBy"])))
-                
-            # 9. dcterms:identifier 
-            if row.get("dcterms:identifier"):
-                g.add((sub, NS["dcterms"]["identifier"], URIRef(row["dcterms:identifier"])))
-                
-            # 10. schema:screenwriter 
-            if row.get("schema:screenwriter"):
-                for writer in row["schema:screenwriter"].split(';'):
-                    g.add((sub, NS["schema"]["screenwriter"], Literal(writer.strip())))
-                    
-            # 11. schema:genre 
-            if row.get("schema:genre"):
-                for genre in row["schema:genre"].split(';'):
-                    g.add((sub, NS["schema"]["genre"], Literal(genre.strip())))
-                    
-            # 12. schema:productionCompany 
-            if row.get("schema:productionCompany"):
-                for company in row["schema:productionCompany"].split(';'):
-                    g.add((sub, NS["schema"]["productionCompany"], Literal(company.strip())))
-                    
-            # 13. schema:duration 
-            if row.get("schema:duration"):
-                g.add((sub, NS["schema"]["duration"], Literal(row["schema:duration"])))
-
-# 12. PSTR.csv (Posters & Media Objects) 
-if os.path.exists("PSTR.csv"):
-    with open("PSTR.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type (schema:ImageObject)
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. dcterms:title 
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-
-            # 3. schema:creator 
-            if row.get("schema:creator"):
-                g.add((sub, NS["schema"]["creator"], Literal(row["schema:creator"])))
-
-            # 4. schema:dateCreated (Literal - xsd:gYear)
-            if row.get("schema:dateCreated"):
-                g.add((sub, NS["schema"]["dateCreated"], Literal(row["schema:dateCreated"], datatype=XSD.gYear)))
-
-            # 5. dcterms:format 
-            if row.get("dcterms:format"):
-                g.add((sub, NS["dcterms"]["format"], Literal(row["dcterms:format"])))
-
-            # 6. dcterms:isPartOf 
-            if row.get("dcterms:isPartOf"):
-                g.add((sub, NS["dcterms"]["isPartOf"], get_sp_uri(row["dcterms:isPartOf"])))
-
-            # 7. schema:url 
-            if row.get("schema:url"):
-                g.add((sub, NS["schema"]["url"], URIRef(row["schema:url"])))
-
-# 13. SCRPT.csv (Screenplay & Creative Works) 
-if os.path.exists("SCRPT.csv"):
-    with open("SCRPT.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                p_parts = row["rdf:type"].split(':')
-                g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-            
-            # 2. dcterms:title 
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-
-            # 3. schema:author 
-            if row.get("schema:author"):
-                for author in row["schema:author"].split(';'):
-                    g.add((sub, NS["schema"]["author"], Literal(author.strip())))
-
-            # 4. dcterms:language 
-            if row.get("dcterms:language"):
-                g.add((sub, NS["dcterms"]["language"], Literal(row["dcterms:language"])))
-
-            # 5. dcterms:format 
-            if row.get("dcterms:format"):
-                g.add((sub, NS["dcterms"]["format"], Literal(row["dcterms:format"])))
-
-            # 6. schema:dateCreated (Literal - xsd:gYear)
-            if row.get("schema:dateCreated"):
-                g.add((sub, NS["schema"]["dateCreated"], Literal(row["schema:dateCreated"], datatype=XSD.gYear)))
-
-            # 7. dcterms:isPartOf 
-            if row.get("dcterms:isPartOf"):
-                g.add((sub, NS["dcterms"]["isPartOf"], get_sp_uri(row["dcterms:isPartOf"])))
-
-            # 8. owl:sameAs 
-            if row.get("owl:sameAs"):
-                g.add((sub, NS["owl"]["sameAs"], URIRef(row["owl:sameAs"])))
-
-# 14. VDGM.csv (Video Game) 
-if os.path.exists("VDGM.csv"):
-    with open("VDGM.csv", newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            
-            sub = NS["sp"][row["id"]]
-            
-            # 1. rdf:type 
-            if row.get("rdf:type"):
-                
-                type_val = row["rdf:type"]
-                if "schema" in type_val and ":" not in type_val:
-                    g.add((sub, RDF.type, NS["schema"]["VideoGame"]))
-                elif ":" in type_val:
-                    p_parts = type_val.split(':')
-                    g.add((sub, RDF.type, NS[p_parts[0]][p_parts[1]]))
-
-            # 2. dcterms:title (Literal)
-            if row.get("dcterms:title"):
-                g.add((sub, NS["dcterms"]["title"], Literal(row["dcterms:title"])))
-
-            # 3. schema:publisher (Literal - Ubisoft)
-            if row.get("schema:publisher"):
-                g.add((sub, NS["schema"]["publisher"], Literal(row["schema:publisher"])))
-
-            # 4. schema:genre (Literal - Beat 'em up)
-            if row.get("schema:genre"):
-                g.add((sub, NS["schema"]["genre"], Literal(row["schema:genre"])))
-
-            # 5. schema:gamePlatform 
-            if row.get("schema:gamePlatform"):
-                for platform in row["schema:gamePlatform"].split(';'):
-                    g.add((sub, NS["schema"]["gamePlatform"], Literal(platform.strip())))
-
-            # 6. schema:datePublished (Literal - xsd:gYear)
-            if row.get("schema:datePublished"):
-                g.add((sub, NS["schema"]["datePublished"], Literal(row["schema:datePublished"], datatype=XSD.gYear)))
-
-            # 7. schema:isBasedOn 
-            if row.get("schema:isBasedOn"):
-                
-                val = row["schema:isBasedOn"]
-                if "local" in val and ":" not in val:
-                    val = val.replace("local", "local:")
-                g.add((sub, NS["schema"]["isBasedOn"], get_sp_uri(val)))
-
-            # 8. dcterms:identifier (URIRef - Wikidata linki)
-            if row.get("dcterms:identifier"):
-                g.add((sub, NS["dcterms"]["identifier"], URIRef(row["dcterms:identifier"])))
-
-# ======== Final Serialization ========= #
-g.serialize(destination="scott_pilgrim_master.ttl", format="turtle")
-print("Process completed. All 14 files processed individually.")
\ No newline at end of file
+# ======== Base Configuration ========= #
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from rdflib import Graph, Namespace, URIRef, Literal, RDF, XSD
+import instrument
+from buildtools import file_hash, load_manifest, save_manifest
+from instrument import span
+
+# All Namespaces
+NS = {
+    "sp": Namespace("https://scottpilgrim.org/resource/"),
+    "bf": Namespace("http://id.loc.gov/ontologies/bibframe/"),
+    "dcterms": Namespace("http://purl.org/dc/terms/"),
+    "foaf": Namespace("http://xmlns.com/foaf/0.1/"),
+    "gn": Namespace("http://www.geonames.org/ontology#"),
+    "owl": Namespace("http://www.w3.org/2002/07/owl#"),
+    "rdfs": Namespace("http://www.w3.org/2000/01/rdf-schema#"),
+    "schema": Namespace("https://schema.org/"),
+    "skos": Namespace("http://www.w3.org/2004/02/skos/core#"),
+    "mo": Namespace("http://purl.org/ontology/mo/"),
+    "rel": Namespace("http://purl.org/vocab/relationship/"),
+    "rdf": Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#"),
+    "org": Namespace("http://www.w3.org/ns/org#")
+}
+
+def init_graph():
+    g = Graph()
+    for prefix, ns in NS.items():
+        g.bind(prefix, ns)
+    return g
+
+# ======== Term Interning ========= #
+
+# Catalogues repeat the same references, genres, formats and companies on many
+# rows; every term constructor below is memoized so each distinct value is built
+# (and hashed into the store) as one shared object. Bounded LRU, per process.
+TERM_CACHE_SIZE = 1 << 16
+
+@lru_cache(maxsize=TERM_CACHE_SIZE)
+def get_sp_uri(val):
+    if not val: return None
+    return NS["sp"][val.replace("local:", "").strip()]
+
+@lru_cache(maxsize=TERM_CACHE_SIZE)
+def intern_literal(val, datatype=None):
+    return Literal(val, datatype=datatype)
+
+@lru_cache(maxsize=TERM_CACHE_SIZE)
+def intern_uri(val):
+    return URIRef(val)
+
+@lru_cache(maxsize=TERM_CACHE_SIZE)
+def get_local_uri(val):
+    # Some exports lost the colon (e.g. "localmedia_comic_series")
+    if ":" not in val and val.startswith("local"):
+        val = val[len("local"):]
+    return get_sp_uri(val)
+
+@lru_cache(maxsize=TERM_CACHE_SIZE)
+def resolve_curie(val):
+    # "prefix:term" -> URIRef through NS, tolerating a lost colon (e.g. "schemaVideoGame")
+    val = val.strip()
+    if ":" in val:
+        prefix, term = val.split(":", 1)
+    else:
+        prefix = next((p for p in NS if val.startswith(p)), None)
+        term = val[len(prefix):] if prefix else val
+    if prefix not in NS:
+        return None
+    return NS[prefix][term]
+
+def term_cache_stats():
+    # {cache name: (hits, misses, current size)}
+    caches = {
+        "sp_uri": get_sp_uri, "local_uri": get_local_uri, "curie": resolve_curie,
+        "uri": intern_uri, "literal": intern_literal,
+    }
+    return {name: fn.cache_info()[:2] + (fn.cache_info().currsize,) for name, fn in caches.items()}
+
+# ======== Mapping Specs ========= #
+
+# Term kinds for a column's object
+LIT = "literal"      # Literal, optionally typed
+URI = "uri"          # external IRI copied as-is (Wikidata, fandom, ...)
+LOCAL = "local"      # "local:xyz" reference into the sp: namespace
+CURIE = "curie"      # "prefix:term" resolved through NS (rdf:type values)
+
+# kind, datatype, multi-value separator, predicate (defaults to the column header)
+Column = namedtuple("Column", "kind datatype sep predicate", defaults=(None, None, None))
+
+def person_or_character(sub_id):
+    # PPL fallback if rdf:type is empty
+    return NS["schema"]["FictionalCharacter"] if "char_" in sub_id else NS["foaf"]["Person"]
+
+GYEAR = XSD.gYear
+INTEGER = XSD.integer
+
+# One spec per source table:
+#   subject  - candidate subject columns, first non-empty wins
+#   local    - subject values are "local:" references rather than bare ids
+#   defines  - False if the subject column only refers to ids defined in other
+#              tables (checked by validate_refs instead of counted as definitions)
+#   fallback_type - optional callable(subject_id) used when rdf:type is empty
+#   columns  - column header -> Column
+MAPPINGS = {
+    # 1. PPL.csv (Characters & Persons)
+    "PPL.csv": {
+        "subject": ("id",),
+        "fallback_type": person_or_character,
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "foaf:name": Column(LIT),
+            "schema:roleName": Column(LIT),
+            "schema:portrayedBy": Column(LOCAL),
+            "org:memberOf": Column(LOCAL, sep=";"),
+            "owl:sameAs": Column(URI),
+            "foaf:page": Column(URI),
+            "dcterms:isPartOf": Column(LOCAL),
+        },
+    },
+    # 2. RLTNS.csv (Relationships)
+    "RLTNS.csv": {
+        "subject": ("Subject",),
+        "local": True,
+        "defines": False,
+        "columns": {
+            "rel:lifePartnerOf": Column(LOCAL, sep=";"),
+            "rel:ambivalentOf": Column(LOCAL, sep=";"),
+            "rel:friendOf": Column(LOCAL, sep=";"),
+            "rel:livesWith": Column(LOCAL, sep=";"),
+            "rel:antagonistOf": Column(LOCAL, sep=";"),
+            "org:memberOf": Column(LOCAL, sep=";"),
+        },
+    },
+    # 3. ANIM.csv (Anime Series)
+    "ANIM.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "schema:director": Column(LIT),
+            "schema:screenwriter": Column(LIT, sep=";"),
+            "schema:productionCompany": Column(LIT, sep=";"),
+            "schema:broadcaster": Column(LIT),
+            "schema:datePublished": Column(LIT, GYEAR),
+            "schema:numberOfSeasons": Column(LIT, INTEGER),
+            "schema:numberOfEpisodes": Column(LIT, INTEGER),
+            "schema:genre": Column(LIT, sep=";"),
+            "schema:isBasedOn": Column(LOCAL),
+            "dcterms:identifier": Column(URI),
+        },
+    },
+    # 4. CMC.csv (Comic Series)
+    "CMC.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "schema:author": Column(LIT),
+            "schema:publisher": Column(LIT),
+            "schema:startDate": Column(LIT, GYEAR),
+            "schema:endDate": Column(LIT, GYEAR),
+            "schema:numberOfVolumes": Column(LIT, INTEGER),
+            "schema:genre": Column(LIT, sep=";"),
+            "dcterms:identifier": Column(URI),
+        },
+    },
+    # 5. STRCTR.csv (Soundtrack & Songs)
+    "STRCTR.csv": {
+        "subject": ("id", "Subject"),
+        "local": True,
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "schema:producer": Column(LIT),
+            "schema:performer": Column(LOCAL, sep=";"),
+            "schema:datePublished": Column(LIT, GYEAR),
+            "dcterms:format": Column(LIT, sep=";"),
+            "schema:genre": Column(LIT, sep=";"),
+            "dcterms:isPartOf": Column(LOCAL),
+            "owl:sameAs": Column(URI),
+        },
+    },
+    # 6. SNDTRCK.csv (Soundtrack & Music Recordings)
+    "SNDTRCK.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "schema:producer": Column(LIT),
+            "schema:performer": Column(LOCAL, sep=";"),
+            "schema:datePublished": Column(LIT, GYEAR),
+            "dcterms:format": Column(LIT, sep=";"),
+            "schema:genre": Column(LIT, sep=";"),
+            "dcterms:isPartOf": Column(LOCAL),
+            "owl:sameAs": Column(URI),
+        },
+    },
+    # 7. GTR.csv (Guitars & Instruments)
+    "GTR.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "foaf:name": Column(LIT),
+            "dcterms:description": Column(LIT),
+            "schema:ownedBy": Column(LOCAL),
+            "schema:brand": Column(LIT),
+            "schema:productionDate": Column(LIT),
+            "schema:material": Column(LIT, sep=";"),
+            "schema:color": Column(LIT),
+            "owl:sameAs": Column(URI),
+        },
+    },
+    # 8. CSLM.csv (Landmarks & Locations)
+    "CSLM.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "foaf:name": Column(LIT),
+            "dcterms:description": Column(LIT),
+            "schema:address": Column(LIT),
+            "schema:architect": Column(LIT),
+            "schema:dateCreated": Column(LIT),
+            "dcterms:isPartOf": Column(LOCAL),
+            "owl:sameAs": Column(URI),
+        },
+    },
+    # 9. GRPS.csv (Groups & Organizations)
+    "GRPS.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "foaf:name": Column(LIT),
+            "dcterms:description": Column(LIT),
+            "owl:sameAs": Column(URI),
+        },
+    },
+    # 10. PLMTR.csv (Plumtree & Inspirations)
+    "PLMTR.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "mo:performer": Column(URI),
+            "mo:genre": Column(LIT),
+            "dcterms:issued": Column(LIT, GYEAR),
+            "dcterms:medium": Column(LIT),
+            "dcterms:extent": Column(LIT),
+            "mo:publisher": Column(LIT),
+            "dcterms:description": Column(LIT),
+            "dcterms:isPartOf": Column(LOCAL),
+            "owl:sameAs": Column(URI),
+        },
+    },
+    # 11. SCTT_MV.csv (Movie Details)
+    "SCTT_MV.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(URI),  # full schema.org IRI in this export
+            "dcterms:title": Column(LIT),
+            "schema:director": Column(URI),
+            "schema:actor": Column(URI, sep=";"),
+            "schema:datePublished": Column(LIT, GYEAR),
+            "schema:isBasedOn": Column(LOCAL),
+            "schema:locationCreated": Column(LOCAL),
+            "schema:musicBy": Column(LOCAL),
+            "dcterms:identifier": Column(URI),
+            "schema:screenwriter": Column(LIT, sep=";"),
+            "schema:genre": Column(LIT, sep=";"),
+            "schema:productionCompany": Column(LIT, sep=";"),
+            "schema:duration": Column(LIT),
+        },
+    },
+    # 12. PSTR.csv (Posters & Media Objects)
+    "PSTR.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "schema:creator": Column(LIT),
+            "schema:dateCreated": Column(LIT, GYEAR),
+            "dcterms:format": Column(LIT),
+            "dcterms:isPartOf": Column(LOCAL),
+            "schema:url": Column(URI),
+        },
+    },
+    # 13. SCRPT.csv (Screenplay & Creative Works)
+    "SCRPT.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "schema:author": Column(LIT, sep=";"),
+            "dcterms:language": Column(LIT),
+            "dcterms:format": Column(LIT),
+            "schema:dateCreated": Column(LIT, GYEAR),
+            "dcterms:isPartOf": Column(LOCAL),
+            "owl:sameAs": Column(URI),
+        },
+    },
+    # 14. VDGM.csv (Video Game)
+    "VDGM.csv": {
+        "subject": ("id",),
+        "columns": {
+            "rdf:type": Column(CURIE),
+            "dcterms:title": Column(LIT),
+            "schema:publisher": Column(LIT),
+            "schema:genre": Column(LIT),
+            "schema:gamePlatform": Column(LIT, sep=";"),
+            "schema:datePublished": Column(LIT, GYEAR),
+            "schema:isBasedOn": Column(LOCAL),
+            "dcterms:identifier": Column(URI),
+        },
+    },
+}
+
+# ======== Spec Compilation ========= #
+
+def make_term(kind, datatype):
+    # Returns a function: raw cell value -> rdflib term (or None to skip)
+    if kind == LIT:
+        if datatype is None:
+            return intern_literal
+        return lambda v: intern_literal(v, datatype)
+    if kind == URI:
+        return intern_uri
+    if kind == LOCAL:
+        return get_local_uri
+    if kind == CURIE:
+        return resolve_curie
+    raise ValueError(f"Unknown column kind: {kind}")
+
+def make_emitter(pred, column, add):
+    to_term = make_term(column.kind, column.datatype)
+    sep = column.sep
+
+    if sep:
+        def emit(sub, val):
+            for part in val.split(sep):
+                part = part.strip()
+                if part:
+                    obj = to_term(part)
+                    if obj is not None:
+                        add((sub, pred, obj))
+    elif column.kind in (LOCAL, CURIE):
+        def emit(sub, val):
+            obj = to_term(val)
+            if obj is not None:
+                add((sub, pred, obj))
+    else:
+        def emit(sub, val):
+            add((sub, pred, to_term(val)))
+    return emit
+
+def compile_mapping(spec, header, add):
+    """Compile a mapping spec against a CSV header.
+
+    Returns (subject_fn, emitters, emit_fallback) where emitters is a list of
+    (column index, emit(sub, value)) for the columns actually present.
+    """
+    index = {name: i for i, name in enumerate(header)}
+
+    sub_cols = [index[c] for c in spec["subject"] if c in index]
+    if spec.get("local"):
+        make_sub = get_sp_uri
+    else:
+        make_sub = NS["sp"].term
+
+    def subject_fn(row):
+        for i in sub_cols:
+            if row[i]:
+                return row[i], make_sub(row[i])
+        return None, None
+
+    emitters = []
+    for name, column in spec["columns"].items():
+        if name not in index:
+            continue
+        if name == "rdf:type":
+            pred = RDF.type
+        else:
+            pred = resolve_curie(column.predicate or name)
+        emitters.append((index[name], make_emitter(pred, column, add)))
+
+    fallback = spec.get("fallback_type")
+    if fallback:
+        type_idx = index.get("rdf:type")
+
+        def emit_fallback(row, sub_id, sub):
+            if type_idx is None or not row[type_idx]:
+                add((sub, RDF.type, fallback(sub_id)))
+    else:
+        emit_fallback = None
+
+    return subject_fn, emitters, emit_fallback
+
+# ======== File Processing ========= #
+
+def counting(add, s):
+    # Only wrapped in when instrumentation is on
+    def add_counted(triple):
+        s.count("triples_added")
+        add(triple)
+    return add_counted
+
+def convert_file(path, spec, add):
+    try:
+        _convert_file(path, spec, add)
+    except UnicodeDecodeError as e:
+        # Spreadsheet exports default to cp1252 on Windows; the tables must be UTF-8
+        raise ValueError(f"{path} is not UTF-8 (byte 0x{e.object[e.start]:02x} at offset {e.start}); "
+                         "re-save it as UTF-8") from None
+
+def _convert_file(path, spec, add):
+    with span("csv_convert", file=os.path.basename(path)) as s, \
+            open(path, newline='', encoding='utf-8') as f:
+        if instrument.ENABLED:
+            add = counting(add, s)
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        width = len(header)
+        subject_fn, emitters, emit_fallback = compile_mapping(spec, header, add)
+
+        rows = 0
+        for row in reader:
+            rows += 1
+            if len(row) < width:
+                row += [""] * (width - len(row))
+
+            sub_id, sub = subject_fn(row)
+            if sub is None:
+                continue
+
+            if emit_fallback:
+                emit_fallback(row, sub_id, sub)
+
+            for i, emit in emitters:
+                val = row[i]
+                if val:
+                    emit(sub, val)
+        s.count("rows_read", rows)
+
+# The tables live in csvs/ beside this script; a working directory that holds
+# them directly (the old layout, and benchmark.py's scaled copies) still wins
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "csvs")
+
+def default_data_dir():
+    return "." if any(os.path.exists(name) for name in MAPPINGS) else DATA_DIR
+
+def convert_all(add, base_dir="."):
+    for name, spec in MAPPINGS.items():
+        path = os.path.join(base_dir, name)
+        if os.path.exists(path):
+            convert_file(path, spec, add)
+
+# ======== Streaming Output ========= #
+
+class SeenSet:
+    """Bounded hash set for in-flight deduplication (oldest entries are forgotten first)."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.seen = set()
+        self.order = deque()
+
+    def add(self, key):
+        # Returns False if key was already seen
+        h = hash(key)
+        if h in self.seen:
+            return False
+        self.seen.add(h)
+        self.order.append(h)
+        if len(self.order) > self.max_size:
+            self.seen.discard(self.order.popleft())
+        return True
+
+class NTriplesWriter:
+    """Writes each triple to disk as soon as it is emitted, one N-Triples line per triple."""
+
+    def __init__(self, f, dedup=0):
+        self.f = f
+        self.seen = SeenSet(dedup) if dedup else None
+        self.count = 0
+
+    def add(self, triple):
+        line = f"{triple[0].n3()} {triple[1].n3()} {triple[2].n3()} .\n"
+        if self.seen is not None and not self.seen.add(line):
+            return
+        self.f.write(line)
+        self.count += 1
+
+    def close(self):
+        pass
+
+PN_LOCAL = re.compile(r"^[A-Za-z_][A-Za-z0-9_\-]*$")
+
+class TurtleWriter(NTriplesWriter):
+    """Streaming Turtle: prefixes up front, consecutive triples of one subject grouped with ';'."""
+
+    prefixes = dict(NS, xsd=Namespace(str(XSD)))
+
+    def __init__(self, f, dedup=0, header=True):
+        super().__init__(f, dedup)
+        # Longest namespace first so "sp:" never shadows a more specific IRI
+        self.by_length = sorted(((str(ns), p) for p, ns in self.prefixes.items()), key=lambda x: -len(x[0]))
+        # Rendered terms, bounded like the term constructors so memory stays flat on large tables
+        self.qname = lru_cache(maxsize=TERM_CACHE_SIZE)(self.render)
+        self.subject = None
+        if header:
+            self.write_header(f)
+
+    @classmethod
+    def write_header(cls, f):
+        for prefix, ns in sorted(cls.prefixes.items()):
+            f.write(f"@prefix {prefix}: <{ns}> .\n")
+        f.write("\n")
+
+    def render(self, term):
+        if isinstance(term, URIRef):
+            for ns, prefix in self.by_length:
+                if term.startswith(ns) and PN_LOCAL.match(term[len(ns):]):
+                    return f"{prefix}:{term[len(ns):]}"
+        elif isinstance(term, Literal) and term.datatype is not None:
+            return f"{Literal(str(term)).n3()}^^{self.qname(term.datatype)}"
+        return term.n3()
+
+    def add(self, triple):
+        s, p, o = triple
+        if self.seen is not None and not self.seen.add((s, p, o)):
+            return
+        pred = "a" if p == RDF.type else self.qname(p)
+        if s == self.subject:
+            self.f.write(f" ;\n    {pred} {self.qname(o)}")
+        else:
+            if self.subject is not None:
+                self.f.write(" .\n\n")
+            self.subject = s
+            self.f.write(f"{self.qname(s)} {pred} {self.qname(o)}")
+        self.count += 1
+
+    def close(self):
+        if self.subject is not None:
+            self.f.write(" .\n")
+
+# ======== Parallel Conversion ========= #
+
+def shard_writer(f, fmt, dedup):
+    # Shards never carry their own Turtle prefix header; merge_shards writes one
+    return NTriplesWriter(f, dedup) if fmt == "nt" else TurtleWriter(f, dedup, header=False)
+
+def convert_shard(name, base_dir, shard_path, fmt="nt", dedup=0):
+    # Worker: convert one CSV into its own shard file, returns the triple count
+    with open(shard_path, "w", encoding="utf-8") as f:
+        writer = shard_writer(f, fmt, dedup)
+        convert_file(os.path.join(base_dir, name), MAPPINGS[name], writer.add)
+        writer.close()
+    return writer.count
+
+def convert_tei_sources(sources, add):
+    # Screenplay triples (scenes, appearances, line counts) from TEI, see tei_convert.py
+    from tei_convert import convert_tei
+    for source in sources:
+        with span("tei_convert", file=os.path.basename(source)):
+            scenes, unresolved = convert_tei(source, add)
+        if unresolved:
+            print(f"{source}: {scenes} scene(s), unresolved refs: {', '.join(sorted(unresolved))}")
+
+def tei_shard(sources, shard_path, fmt="nt", dedup=0):
+    # The TEI sources as one more shard, placed after the CSV shards
+    with open(shard_path, "w", encoding="utf-8") as f:
+        writer = shard_writer(f, fmt, dedup)
+        convert_tei_sources(sources, writer.add)
+        writer.close()
+    return ("TEI", shard_path, writer.count)
+
+def convert_parallel(jobs=None, fmt="nt", dedup=0, base_dir="."):
+    """Convert every present CSV in its own process.
+
+    Returns (shard_dir, [(name, shard_path, count), ...]) in MAPPINGS order,
+    so merging the shards in list order is deterministic whatever the
+    completion order of the workers. The caller removes shard_dir.
+    """
+    names = [n for n in MAPPINGS if os.path.exists(os.path.join(base_dir, n))]
+    shard_dir = tempfile.mkdtemp(prefix="sp_shards_")
+    paths = [os.path.join(shard_dir, n.replace(".csv", "." + fmt)) for n in names]
+    counts = run_shards(names, paths, jobs, fmt, dedup, base_dir)
+    return shard_dir, list(zip(names, paths, counts))
+
+def run_shards(names, paths, jobs=None, fmt="nt", dedup=0, base_dir="."):
+    # Serial when a single worker (or a single file) is requested
+    n = len(names)
+    if jobs == 1 or n <= 1:
+        return [convert_shard(name, base_dir, path, fmt, dedup) for name, path in zip(names, paths)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(convert_shard, names, [base_dir] * n, paths, [fmt] * n, [dedup] * n))
+
+def merge_shards(shards, output, fmt):
+    # Concatenate shards in spec order (Turtle shards share one prefix header)
+    with open(output, "w", encoding="utf-8") as out:
+        if fmt != "nt":
+            TurtleWriter.write_header(out)
+        for i, (name, path, count) in enumerate(shards):
+            if i and fmt != "nt" and count:
+                out.write("\n")
+            with open(path, encoding="utf-8") as f:
+                shutil.copyfileobj(f, out)
+
+# ======== Incremental Build Cache ========= #
+
+CACHE_DIR = ".build_cache"
+
+def cache_manifest(cache_dir):
+    return os.path.join(cache_dir, "manifest.json")
+
+def convert_cached(cache_dir=CACHE_DIR, jobs=1, fmt="nt", dedup=0, base_dir="."):
+    """Reconvert only the CSVs whose content hash changed since the last run.
+
+    Each CSV's fragment is kept in cache_dir next to a manifest of content
+    hashes. Editing the converter (and so possibly the mapping specs), the
+    fragment format or --dedup invalidates every fragment.
+    Returns ([(name, fragment_path, count), ...] in MAPPINGS order,
+    fingerprint of this exact set of fragments, names that were reconverted).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = {"converter": file_hash(__file__), "format": fmt, "dedup": dedup}
+
+    manifest = load_manifest(cache_manifest(cache_dir))
+    if manifest.get("key") != key:
+        manifest = {"key": key, "files": {}, "outputs": {}}
+    entries = manifest["files"]
+
+    names = [n for n in MAPPINGS if os.path.exists(os.path.join(base_dir, n))]
+    hashes = {n: file_hash(os.path.join(base_dir, n)) for n in names}
+    paths = {n: os.path.join(cache_dir, n.replace(".csv", "." + fmt)) for n in names}
+
+    stale = [n for n in names
+             if entries.get(n, {}).get("hash") != hashes[n] or not os.path.exists(paths[n])]
+    counts = run_shards(stale, [paths[n] for n in stale], jobs, fmt, dedup, base_dir)
+    for n, count in zip(stale, counts):
+        entries[n] = {"hash": hashes[n], "count": count}
+
+    # Forget tables that disappeared from base_dir
+    for n in [n for n in entries if n not in hashes]:
+        del entries[n]
+        gone = os.path.join(cache_dir, n.replace(".csv", "." + fmt))
+        if os.path.exists(gone):
+            os.remove(gone)
+
+    save_manifest(cache_manifest(cache_dir), manifest)
+    fingerprint = hashlib.sha256(json.dumps([[n, hashes[n]] for n in names]).encode()).hexdigest()
+    return [(n, paths[n], entries[n]["count"]) for n in names], fingerprint, stale
+
+def tei_cached(cache_dir, sources, fmt="nt", dedup=0):
+    """TEI shard kept in cache_dir, rebuilt when a source or the TEI converter changes.
+
+    Returns (shard, fingerprint, rebuilt).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = [os.path.join(here, "tei_convert.py"), os.path.join(here, "fulltext", "tei_stream.py")]
+    fingerprint = hashlib.sha256(json.dumps(
+        [[p, file_hash(p)] for p in code + list(sources)] + [fmt, dedup]).encode()).hexdigest()
+    path = os.path.join(cache_dir, "tei." + fmt)
+    manifest = load_manifest(cache_manifest(cache_dir))
+    entry = manifest.get("tei", {})
+    if entry.get("fingerprint") == fingerprint and os.path.exists(path):
+        return ("TEI", path, entry["count"]), fingerprint, False
+    shard = tei_shard(sources, path, fmt, dedup)
+    manifest["tei"] = {"fingerprint": fingerprint, "count": shard[2]}
+    save_manifest(cache_manifest(cache_dir), manifest)
+    return shard, fingerprint, True
+
+def output_is_current(cache_dir, output, fingerprint):
+    outputs = load_manifest(cache_manifest(cache_dir)).get("outputs", {})
+    return os.path.exists(output) and outputs.get(os.path.abspath(output)) == fingerprint
+
+def record_output(cache_dir, output, fingerprint):
+    # Called once output has been fully written from this set of fragments
+    manifest = load_manifest(cache_manifest(cache_dir))
+    manifest.setdefault("outputs", {})[os.path.abspath(output)] = fingerprint
+    save_manifest(cache_manifest(cache_dir), manifest)
+
+# ======== Final Serialization ========= #
+
+def write_shards(shards, output, fmt, stream):
+    if stream:
+        with span("merge_shards") as s:
+            merge_shards(shards, output, fmt)
+            s.count("bytes_written", os.path.getsize(output))
+    else:
+        # Graph mode: shards are N-Triples, parsed into one Graph
+        g = init_graph()
+        with span("parse_shards"):
+            for name, path, count in shards:
+                g.parse(path, format="nt")
+        serialize(g, output, fmt)
+
+def serialize(g, output, fmt):
+    with span("serialize", format=fmt) as s:
+        g.serialize(destination=output, format=fmt)
+        s.count("bytes_written", os.path.getsize(output))
+
+def tee(*adds):
+    # One add() feeding several sinks (Graph, stream writer, SQLite store)
+    def add(triple):
+        for a in adds:
+            a(triple)
+    return add
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the csvs/ tables into the Scott Pilgrim knowledge graph.")
+    parser.add_argument("--stream", action="store_true", help="write triples while reading rows instead of building a Graph")
+    parser.add_argument("--format", choices=["turtle", "nt"], default="turtle", help="output format (default: turtle)")
+    parser.add_argument("--dedup", type=int, default=0, metavar="N", help="in --stream mode, drop duplicates among the last N triples")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N", help="convert files in N worker processes (0 = one per CPU)")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIR, metavar="DIR",
+                        help=f"only reconvert CSVs changed since the last run, keeping fragments in DIR (default: {CACHE_DIR}); "
+                             "implies --stream, since splicing fragments is what makes a cached rebuild fast")
+    parser.add_argument("--sqlite", nargs="?", const="scott_pilgrim_master.sqlite", metavar="DB",
+                        help="also load the triples into an indexed SQLite store (default: scott_pilgrim_master.sqlite)")
+    parser.add_argument("--check", action="store_true", help="abort if any local: reference points at an undefined id")
+    parser.add_argument("--stats", action="store_true", help="print term cache hit/miss counters (this process only)")
+    parser.add_argument("-o", "--output", help="output file (default: scott_pilgrim_master.ttl / .nt)")
+    parser.add_argument("--data", metavar="DIR", help="directory holding the CSV tables (default: the working directory if it has them, else csvs/)")
+    parser.add_argument("--tei", action="append", default=[], metavar="FILE",
+                        help="also add scene/appearance triples from a TEI screenplay (repeatable)")
+    args = parser.parse_args()
+
+    data_dir = args.data or default_data_dir()
+    if not any(os.path.exists(os.path.join(data_dir, name)) for name in MAPPINGS):
+        raise SystemExit(f"No mapped CSV tables found in {data_dir}")
+
+    if args.check:
+        from validate_refs import check_references, print_report
+        errors, dangling = check_references(data_dir)
+        if errors or dangling:
+            print_report(errors, dangling)
+            raise SystemExit(1)
+
+    output = args.output or ("scott_pilgrim_master.nt" if args.format == "nt" else "scott_pilgrim_master.ttl")
+    jobs = args.jobs or None
+    # A cached build splices the unchanged fragments into the output; parsing
+    # them all back into a Graph would cost more than converting from scratch
+    stream = args.stream or bool(args.cache)
+    # Graph mode always merges N-Triples shards into the Graph
+    shard_fmt = args.format if stream else "nt"
+
+    store = None
+    if args.sqlite:
+        from triple_store import TripleStore
+        store = TripleStore(args.sqlite)
+    # Serial modes feed the store while converting; shard-based modes load it from the output
+    loading = store.bulk(replace=True) if store is not None else nullcontext()
+
+    if args.cache:
+        # One fragment set per shard format, so Turtle and N-Triples runs don't evict each other
+        cache_dir = os.path.join(args.cache, shard_fmt)
+        with span("convert_cached"):
+            shards, fingerprint, rebuilt = convert_cached(cache_dir, jobs, shard_fmt, args.dedup, data_dir)
+            if args.tei:
+                shard, tei_fingerprint, tei_rebuilt = tei_cached(cache_dir, args.tei, shard_fmt, args.dedup)
+                shards.append(shard)
+                fingerprint = f"{fingerprint}/{tei_fingerprint}"
+                rebuilt = rebuilt + ["TEI"] if tei_rebuilt else rebuilt
+        fingerprint = f"{fingerprint}/{args.format}"
+        if not output_is_current(cache_dir, output, fingerprint):
+            write_shards(shards, output, args.format, stream)
+            record_output(cache_dir, output, fingerprint)
+            print(f"Process completed. Rebuilt {len(rebuilt)} of {len(shards)} files: {', '.join(rebuilt) or '-'}.")
+        else:
+            print(f"Process completed. All {len(shards)} files unchanged, {output} is up to date.")
+    elif args.jobs != 1:
+        with span("convert_parallel"):
+            shard_dir, shards = convert_parallel(jobs, shard_fmt, args.dedup, data_dir)
+            if args.tei:
+                shards.append(tei_shard(args.tei, os.path.join(shard_dir, "tei." + shard_fmt), shard_fmt, args.dedup))
+        try:
+            write_shards(shards, output, args.format, args.stream)
+        finally:
+            shutil.rmtree(shard_dir)
+        print(f"Process completed. {len(shards)} files converted in parallel, {sum(c for _, _, c in shards)} triples.")
+    elif args.stream:
+        with open(output, "w", encoding="utf-8") as f, loading:
+            writer = (NTriplesWriter if args.format == "nt" else TurtleWriter)(f, args.dedup)
+            add = tee(writer.add, store.add) if store is not None else writer.add
+            convert_all(add, data_dir)
+            convert_tei_sources(args.tei, add)
+            writer.close()
+        instrument.count("bytes_written", os.path.getsize(output))
+        print(f"Process completed. {writer.count} triples streamed to {output}.")
+    else:
+        g = init_graph()
+        with loading:
+            add = tee(g.add, store.add) if store is not None else g.add
+            convert_all(add, data_dir)
+            convert_tei_sources(args.tei, add)
+        serialize(g, output, args.format)
+        print(f"Process completed. {len(MAPPINGS)} files processed from mapping specs.")
+
+    if store is not None:
+        if args.cache or args.jobs != 1:
+            with span("sqlite_load"):
+                store.load(output, args.format)
+        print(f"SQLite store updated: {args.sqlite} ({len(store)} triples)")
+        store.close()
+
+    if args.stats:
+        for name, (hits, misses, size) in term_cache_stats().items():
+            print(f"{name:<10} hits={hits:<8} misses={misses:<8} size={size}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+# ======== Snapshot Format ========= #
+#
+# Compact binary copy of the master graph, built next to the .ttl so that
+# consumers can skip the Turtle parse:
+#
+#   header      magic, version, byte order, term count, triple count
+#   offsets     (terms + 1) x uint64, start of each term in the blob
+#   blob        terms as N-Triples strings (UTF-8), sorted, so term ids are ordered
+#   SPO/POS/OSP triples x 3 x uint32 each, term ids sorted in that column order
+#
+# Terms stay N-Triples strings ("<iri>", "\"literal\"^^<dt>", "_:b0"), so lookups
+# never build rdflib objects.
+
+MAGIC = b"SPGS"
+VERSION = 1
+HEADER = struct.Struct("<4sHcxIQ")  # magic, version, byte order, pad, n_terms, n_triples
+ORDERS = {"spo": (0, 1, 2), "pos": (1, 2, 0), "osp": (2, 0, 1)}
+
+def build_snapshot(triples, path):
+    """Write triples (rdflib terms) to a snapshot file. Returns (terms, triples)."""
+    rows = {(s.n3(), p.n3(), o.n3()) for s, p, o in triples}
+    terms = sorted({t for row in rows for t in row}, key=lambda t: t.encode("utf-8"))
+    ids = {t: i for i, t in enumerate(terms)}
+    encoded = [(ids[s], ids[p], ids[o]) for s, p, o in rows]
+
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for t in terms:
+        blob += t.encode("utf-8")
+        offsets.append(len(blob))
+    blob += b"\0" * (-len(blob) % 4)  # keep the uint32 tables aligned
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode(), len(terms), len(encoded)))
+        offsets.tofile(f)
+        f.write(blob)
+        for order in ORDERS.values():
+            table = array("I")
+            for row in sorted(tuple(r[i] for i in order) for r in encoded):
+                table.extend(row)
+            table.tofile(f)
+    return len(terms), len(encoded)
+
+# ======== Memory-mapped Loader ========= #
+
+class _Rows:
+    # Sequence view of the first k columns of a uint32 triple table, for bisect
+    def __init__(self, table, k):
+        self.table = table
+        self.k = k
+
+    def __len__(self):
+        return len(self.table) // 3
+
+    def __getitem__(self, i):
+        return tuple(self.table[3 * i:3 * i + self.k])
+
+class Snapshot:
+    """Read-only, memory-mapped snapshot; nothing is decoded until it is asked for."""
+
+    def __init__(self, path):
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, order, self.n_terms, self.n_triples = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} graph snapshot")
+        if order != sys.byteorder[0].encode():
+            raise ValueError(f"{path} was written on a {'little' if order == b'l' else 'big'}-endian host")
+
+        view = memoryview(self.mm)
+        pos = HEADER.size
+        self.offsets = view[pos:pos + 8 * (self.n_terms + 1)].cast("Q")
+        pos += 8 * (self.n_terms + 1)
+        self.blob_start = pos
+        pos += self.offsets[-1] + (-self.offsets[-1] % 4)
+        size = 12 * self.n_triples
+        self.tables = {}
+        for name in ORDERS:
+            self.tables[name] = view[pos:pos + size].cast("I")
+            pos += size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for table in self.tables.values():
+            table.release()
+        self.offsets.release()
+        self.mm.close()
+        self.f.close()
+
+    def __len__(self):
+        return self.n_triples
+
+    def term(self, i):
+        start = self.blob_start
+        return self.mm[start + self.offsets[i]:start + self.offsets[i + 1]].decode("utf-8")
+
+    def term_id(self, n3):
+        # Binary search over the sorted term blob
+        key = n3.encode("utf-8")
+        start = self.blob_start
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.mm[start + self.offsets[mid]:start + self.offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and self.term(lo) == n3:
+            return lo
+        return None
+
+    def triple_ids(self, s=None, p=None, o=None):
+        """Yield (s, p, o) id tuples matching a pattern of term ids (None = wildcard)."""
+        # Pick the table whose column order puts every bound position first
+        if s is not None:
+            name = "osp" if (p is None and o is not None) else "spo"
+        elif p is not None:
+            name = "pos"
+        elif o is not None:
+            name = "osp"
+        else:
+            name = "spo"
+        pattern = (s, p, o)
+        prefix = []
+        for i in ORDERS[name]:
+            if pattern[i] is None:
+                break
+            prefix.append(pattern[i])
+        prefix = tuple(prefix)
+
+        table = self.tables[name]
+        rows = _Rows(table, len(prefix))
+        lo = bisect_left(rows, prefix) if prefix else 0
+        hi = bisect_right(rows, prefix) if prefix else len(rows)
+        inverse = [ORDERS[name].index(i) for i in range(3)]
+        for i in range(lo, hi):
+            row = table[3 * i:3 * i + 3]
+            yield row[inverse[0]], row[inverse[1]], row[inverse[2]]
+
+    def triples(self, s=None, p=None, o=None):
+        """Yield (s, p, o) N-Triples strings matching a pattern of N-Triples strings."""
+        ids = []
+        for n3 in (s, p, o):
+            if n3 is None:
+                ids.append(None)
+            else:
+                i = self.term_id(n3)
+                if i is None:
+                    return
+                ids.append(i)
+        for row in self.triple_ids(*ids):
+            yield tuple(self.term(i) for i in row)
+
+# ======== Command Line ========= #
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query a binary snapshot of the master graph.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="parse an RDF file once and write its snapshot")
+    build.add_argument("source", nargs="?", default="scott_pilgrim_master.ttl")
+    build.add_argument("destination", nargs="?", default="scott_pilgrim_master.snap")
+    build.add_argument("--format", default="turtle")
+
+    query = sub.add_parser("query", help="print triples matching a pattern (N-Triples terms)")
+    query.add_argument("snapshot", nargs="?", default="scott_pilgrim_master.snap")
+    query.add_argument("-s", help='subject, e.g. "<https://scottpilgrim.org/resource/char_scott_pilgrim>"')
+    query.add_argument("-p", help="predicate")
+    query.add_argument("-o", help='object, e.g. "\\"Scott Pilgrim\\""')
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from rdflib import Graph
+        g = Graph()
+        g.parse(args.source, format=args.format)
+        n_terms, n_triples = build_snapshot(g, args.destination)
+        print(f"Snapshot written: {args.destination} ({n_terms} terms, {n_triples} triples)")
+    else:
+        with Snapshot(args.snapshot) as snap:
+            for row in snap.triples(args.s, args.p, args.o):
+                print(" ".join(row), ".")
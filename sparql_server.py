@@ -0,0 +1,209 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from rdflib import Graph
+from rdflib.plugins.sparql import prepareQuery
+from rdf_convert import NS
+
+# ======== Example Queries ========= #
+
+# Queries behind the documentation pages, runnable as /sparql?example=<name>
+EXAMPLES = {
+    "characters": """
+        SELECT ?character ?name ?actor WHERE {
+            ?character a schema:FictionalCharacter ;
+                       foaf:name ?name .
+            OPTIONAL { ?character schema:portrayedBy ?actor }
+        } ORDER BY ?name""",
+    "relationships": """
+        SELECT ?a ?relation ?b WHERE {
+            VALUES ?relation { rel:lifePartnerOf rel:friendOf rel:ambivalentOf
+                               rel:antagonistOf rel:livesWith }
+            ?a ?relation ?b .
+        } ORDER BY ?a ?relation""",
+    "media": """
+        SELECT ?work ?title ?type ?date WHERE {
+            ?work dcterms:title ?title ; a ?type .
+            OPTIONAL { ?work schema:datePublished ?date }
+        } ORDER BY ?date""",
+    "band": """
+        SELECT ?member ?name WHERE {
+            ?member org:memberOf sp:group_sex_bob_omb ; foaf:name ?name .
+        }""",
+}
+
+# Result media types by query form
+SELECT_TYPES = {
+    "application/sparql-results+json": "json",
+    "application/sparql-results+xml": "xml",
+    "text/csv": "csv",
+}
+# Boolean results have no CSV form
+ASK_TYPES = {t: f for t, f in SELECT_TYPES.items() if f != "csv"}
+GRAPH_TYPES = {
+    "text/turtle": "turtle",
+    "application/n-triples": "nt",
+    "application/rdf+xml": "xml",
+    "application/ld+json": "json-ld",
+}
+
+# ======== Graph & Caches ========= #
+
+class SparqlService:
+    """Master graph loaded once, with prepared-query and result caches.
+
+    Both caches belong to one load of the .ttl: when its mtime or size
+    changes the graph is reparsed and cached results are dropped.
+    """
+
+    def __init__(self, path, max_results=256):
+        self.path = path
+        self.max_results = max_results
+        self.lock = threading.Lock()
+        self.graph = None
+        self.version = None
+        self.results = OrderedDict()
+        self.refresh()
+
+    def refresh(self):
+        st = os.stat(self.path)
+        version = (st.st_mtime_ns, st.st_size)
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            g = Graph()
+            g.parse(self.path, format="turtle")
+            self.graph = g
+            self.version = version
+            self.last_modified = formatdate(st.st_mtime, usegmt=True)
+            self.results.clear()
+
+    def run(self, query, accept):
+        """Returns (body, content type, etag) for query, from cache when possible."""
+        self.refresh()
+        prepared = prepare(query)
+        form = prepared.algebra.name
+        if form in ("ConstructQuery", "DescribeQuery"):
+            types = GRAPH_TYPES
+        elif form == "AskQuery":
+            types = ASK_TYPES
+        else:
+            types = SELECT_TYPES
+        ctype = next((t for t in types if t in accept), next(iter(types)))
+
+        key = (query, ctype)
+        with self.lock:
+            hit = self.results.get(key)
+            if hit is not None:
+                self.results.move_to_end(key)
+                return hit
+            graph, version = self.graph, self.version
+
+        result = graph.query(prepared)
+        body = result.serialize(format=types[ctype])
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        etag = '"' + hashlib.sha1(repr((version, query, ctype)).encode()).hexdigest() + '"'
+        entry = (body, ctype, etag)
+
+        with self.lock:
+            if version == self.version:
+                self.results[key] = entry
+                if len(self.results) > self.max_results:
+                    self.results.popitem(last=False)
+        return entry
+
+@lru_cache(maxsize=256)
+def prepare(query):
+    # Parsed and translated algebra, reused across requests and graph reloads
+    return prepareQuery(query, initNs=dict(NS))
+
+# ======== HTTP Handler ========= #
+
+class SparqlHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/examples":
+            return self.send_body(200, json.dumps(EXAMPLES, indent=2).encode(), "application/json")
+        if url.path != "/sparql":
+            return self.send_body(404, b"Not found\n", "text/plain")
+
+        if "example" in params:
+            query = EXAMPLES.get(params["example"][0])
+            if query is None:
+                return self.send_body(404, b"Unknown example\n", "text/plain")
+        else:
+            query = params.get("query", [None])[0]
+        self.answer(query)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/sparql":
+            return self.send_body(404, b"Not found\n", "text/plain")
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length).decode("utf-8")
+        if self.headers.get("Content-Type", "").startswith("application/sparql-query"):
+            query = data
+        else:
+            query = parse_qs(data).get("query", [None])[0]
+        self.answer(query)
+
+    def answer(self, query):
+        if not query:
+            return self.send_body(400, b"Missing query\n", "text/plain")
+        try:
+            body, ctype, etag = self.service.run(query, self.headers.get("Accept", ""))
+        except Exception as e:
+            return self.send_body(400, f"Query failed: {e}\n".encode(), "text/plain")
+
+        if self.not_modified(etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", self.service.last_modified)
+            self.end_headers()
+            return
+        self.send_body(200, body, ctype, {"ETag": etag, "Last-Modified": self.service.last_modified})
+
+    def not_modified(self, etag):
+        inm = self.headers.get("If-None-Match")
+        if inm is not None:
+            return etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+        ims = self.headers.get("If-Modified-Since")
+        if ims:
+            try:
+                return parsedate_to_datetime(ims) >= parsedate_to_datetime(self.service.last_modified)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_body(self, status, body, ctype, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve SPARQL over the master graph.")
+    parser.add_argument("source", nargs="?", default="scott_pilgrim_master.ttl")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    SparqlHandler.service = SparqlService(args.source)
+    server = ThreadingHTTPServer((args.host, args.port), SparqlHandler)
+    print(f"SPARQL endpoint on http://{args.host}:{args.port}/sparql (examples: /examples)")
+    server.serve_forever()
@@ -0,0 +1,149 @@
+import argparse
+import os
+import re
+import sys
+from collections import Counter
+from rdflib import RDF, XSD
+from rdf_convert import NS, init_graph, get_sp_uri, get_local_uri, intern_literal
+
+# The streaming TEI reader is shared with the fulltext analyzers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fulltext"))
+from tei_stream import iter_tei
+
+# ======== TEI to RDF ========= #
+#
+# One pass over a screenplay encoded in TEI, emitting into the same add() sink
+# as the CSV conversion. The particDesc comes first in the file, so by the time
+# the body streams past, every "#id" already resolves through the cast's sameAs
+# to a graph resource. Per scene:
+#
+#   sp:<work>_scene_<n>          a schema:CreativeWork ; dcterms:isPartOf <work> ;
+#                                schema:position "n" ; dcterms:title "<head>" ;
+#                                schema:contentLocation <setting ref> ;
+#                                schema:character <each cast member who speaks or appears>
+#   sp:<work>_scene_<n>_<who>    a schema:Role ; schema:character <cast member> ;
+#                                dcterms:isPartOf <scene> ; rdf:value <utterance count>
+#
+# Only scene state is held, so memory does not grow with the length of the script.
+
+SCRIPT_WORK = "item_screenplay"
+
+CREATIVE_WORK = NS["schema"]["CreativeWork"]
+ROLE = NS["schema"]["Role"]
+CHARACTER = NS["schema"]["character"]
+LOCATION = NS["schema"]["contentLocation"]
+MENTIONS = NS["schema"]["mentions"]
+POSITION = NS["schema"]["position"]
+IS_PART_OF = NS["dcterms"]["isPartOf"]
+TITLE = NS["dcterms"]["title"]
+
+def slug(val):
+    return re.sub(r"[^A-Za-z0-9]+", "_", val).strip("_")
+
+class SceneEmitter:
+    """Collects one scene's appearances and line counts, then emits them on close()."""
+
+    def __init__(self, add, work, n):
+        self.add = add
+        self.id = f"{work}_scene_{slug(n)}"
+        self.uri = get_sp_uri(self.id)
+        self.appearances = {}  # URI -> None, in order of first appearance
+        self.mentions = {}
+        self.lines = Counter()  # person id -> utterances
+        add((self.uri, RDF.type, CREATIVE_WORK))
+        add((self.uri, IS_PART_OF, get_sp_uri(work)))
+        add((self.uri, POSITION, intern_literal(n)))
+
+    def close(self, people):
+        for uri in self.appearances:
+            self.add((self.uri, CHARACTER, uri))
+        for uri in self.mentions:
+            self.add((self.uri, MENTIONS, uri))
+        for who, count in self.lines.items():
+            role = get_sp_uri(f"{self.id}_{slug(who)}")
+            self.add((role, RDF.type, ROLE))
+            self.add((role, CHARACTER, people[who]))
+            self.add((role, IS_PART_OF, self.uri))
+            self.add((role, RDF.value, intern_literal(str(count), XSD.integer)))
+
+def convert_tei(path, add, work=SCRIPT_WORK):
+    """Stream one TEI screenplay into add(). Returns (scenes, refs that did not resolve)."""
+    people = {}  # xml:id -> graph URI, from particDesc sameAs
+    unresolved = Counter()
+    scene = None
+    scenes = 0
+
+    def resolve(ref):
+        # "#id" through the cast list, "local:x" straight into the sp: namespace
+        ref = (ref or "").strip()
+        if ref.startswith("#"):
+            uri = people.get(ref[1:])
+        elif ref.startswith("local"):
+            uri = get_local_uri(ref)
+        else:
+            uri = None
+        if uri is None and ref:
+            unresolved[ref] += 1
+        return uri
+
+    def current_scene():
+        # Scripts without scene divs are treated as one scene
+        nonlocal scene, scenes
+        if scene is None:
+            scene = SceneEmitter(add, work, "1")
+            scenes += 1
+        return scene
+
+    def appear(ref):
+        uri = resolve(ref)
+        if uri is not None:
+            target = current_scene()
+            (target.appearances if ref.startswith("#") else target.mentions).setdefault(uri)
+
+    for record in iter_tei(path):
+        kind = record[0]
+        if kind == "person":
+            _, pid, _, same_as = record
+            if same_as:
+                people[pid] = get_local_uri(same_as)
+        elif kind == "scene":
+            if scene is not None:
+                scene.close(people)
+            scene = SceneEmitter(add, work, record[1])
+            scenes += 1
+        elif kind == "head":
+            add((current_scene().uri, TITLE, intern_literal(record[1])))
+        elif kind == "stage":
+            _, _, attrs, refs = record
+            setting = resolve(attrs["ref"]) if attrs.get("ref") else None
+            if setting is not None:
+                if attrs.get("type") == "setting":
+                    add((current_scene().uri, LOCATION, setting))
+                else:
+                    current_scene().mentions.setdefault(setting)
+            for ref in ([attrs["who"]] if attrs.get("who") else []) + refs:
+                appear(ref)
+        elif kind == "speech":
+            _, who, _, _, refs = record
+            if who and resolve("#" + who) is not None:
+                current_scene().appearances.setdefault(people[who])
+                current_scene().lines[who] += 1
+            for ref in refs:
+                appear(ref)
+    if scene is not None:
+        scene.close(people)
+    return scenes, unresolved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert TEI screenplays into scene, appearance and line-count triples.")
+    parser.add_argument("sources", nargs="*", default=[os.path.join("fulltext", "script.xml")])
+    parser.add_argument("--work", default=SCRIPT_WORK, help=f"id of the screenplay resource (default: {SCRIPT_WORK})")
+    parser.add_argument("-o", "--output", default="screenplay.ttl")
+    args = parser.parse_args()
+
+    g = init_graph()
+    for source in args.sources:
+        scenes, unresolved = convert_tei(source, g.add, args.work)
+        print(f"{source}: {scenes} scene(s)" + (f", unresolved: {', '.join(sorted(unresolved))}" if unresolved else ""))
+    g.serialize(destination=args.output, format="turtle")
+    print(f"{len(g)} triples written to {args.output}")
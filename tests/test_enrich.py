@@ -0,0 +1,141 @@
+import asyncio
+import gzip
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from enrich import FactCache, enrich
+
+# ======== Stand-in Server ========= #
+
+# The shapes the real services return, plus the failure cases the pool has to survive
+ENTITIES = {
+    "Q1": {"id": "Q1", "labels": {"en": {"value": "Scott Pilgrim"}},
+           "descriptions": {"en": {"value": "comic book character"}},
+           "aliases": {"en": [{"value": "Scott"}]},
+           "claims": {"P31": [{"mainsnak": {"snaktype": "value", "datavalue": {"value": {"id": "Q1114461"}}}}]}},
+    "Q2": {"id": "Q3", "redirects": {"from": "Q2", "to": "Q3"}, "labels": {"en": {"value": "Ramona Flowers"}}},
+    "Q404": {"id": "Q404", "missing": ""},
+}
+PAGE = (b'<html><head><meta property="og:title" content="Ramona Flowers"/>'
+        b'<meta property="og:description" content="Ramona &amp; her seven evil exes"/></head></html>')
+# Possessives inside double quotes, and content before property
+BASS_PAGE = (b'<html><head><meta content="Scott Pilgrim\'s bass guitar" property="og:title">'
+             b"<meta name='description' content='The \"Rickenbacker\" he plays'></head></html>")
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == "/w/api.php":
+            ids = parse_qs(parts.query)["ids"][0].split("|")
+            body = gzip.compress(json.dumps({"entities": {i: ENTITIES[i] for i in ids}}).encode())
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif parts.path == "/wiki/Ramona":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(PAGE), 64):
+                chunk = PAGE[i:i + 64]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        elif parts.path == "/wiki/Bass":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(BASS_PAGE)))
+            self.end_headers()
+            self.wfile.write(BASS_PAGE)
+        elif parts.path == "/wiki/Moved":
+            self.send_response(301)
+            self.send_header("Location", "https://scottpilgrim.fandom.com/wiki/Ramona")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif parts.path == "/wiki/Truncated":
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b"short")
+            self.close_connection = True
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def endpoints():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield {"www.wikidata.org": base, "scottpilgrim.fandom.com": base}
+    server.shutdown()
+    server.server_close()
+
+# ======== Tests ========= #
+
+WD = "https://www.wikidata.org/wiki/"
+PAGE_IRI = "https://scottpilgrim.fandom.com/wiki/"
+IRIS = [WD + "Q1", WD + "Q2", WD + "Q404", PAGE_IRI + "Ramona", PAGE_IRI + "Moved", PAGE_IRI + "Gone",
+        PAGE_IRI + "Truncated", "https://example.org/unsupported"]
+
+def run(iris, cache, endpoints, **kwargs):
+    return asyncio.run(enrich(iris, cache, limit=4, rate=0, timeout=5, endpoints=endpoints, **kwargs))
+
+def test_enrich_against_standin(tmp_path, endpoints):
+    cache = FactCache(str(tmp_path / "enrich.sqlite"))
+    try:
+        facts, first = run(IRIS, cache, endpoints)
+        _, second = run(IRIS, cache, endpoints)
+    finally:
+        cache.close()
+
+    assert facts[WD + "Q1"] == {"label": "Scott Pilgrim", "description": "comic book character",
+                                "aliases": ["Scott"], "types": ["Q1114461"]}
+    assert facts[WD + "Q2"]["label"] == "Ramona Flowers"  # redirected item
+    assert facts[WD + "Q404"] is None
+    assert facts[PAGE_IRI + "Ramona"] == {"label": "Ramona Flowers", "description": "Ramona & her seven evil exes"}
+    assert facts[PAGE_IRI + "Moved"] == facts[PAGE_IRI + "Ramona"]
+    assert facts[PAGE_IRI + "Gone"] is None
+    assert PAGE_IRI + "Truncated" not in facts and first["failed"] == 1
+    assert first["requests"] == 4  # one wbgetentities call for all items, plus three pages
+    assert first["unsupported"] == 1
+    assert second["cached"] == 6 and second["fetched"] == 0
+
+def test_meta_tags_with_apostrophes_in_any_order(tmp_path, endpoints):
+    cache = FactCache(str(tmp_path / "enrich.sqlite"))
+    try:
+        facts, _ = run([PAGE_IRI + "Bass"], cache, endpoints)
+    finally:
+        cache.close()
+    assert facts[PAGE_IRI + "Bass"] == {"label": "Scott Pilgrim's bass guitar",
+                                        "description": 'The "Rickenbacker" he plays'}
+
+def test_both_wikidata_iri_forms_enriched(tmp_path, endpoints):
+    entity = "http://www.wikidata.org/entity/Q1"
+    cache = FactCache(str(tmp_path / "enrich.sqlite"))
+    try:
+        facts, stats = run([WD + "Q1", entity], cache, endpoints)
+    finally:
+        cache.close()
+    assert facts[entity] == facts[WD + "Q1"] and facts[entity]["label"] == "Scott Pilgrim"
+    assert stats["fetched"] == 2 and stats["requests"] == 1
+
+def test_offline_uses_cache_only(tmp_path, endpoints):
+    cache = FactCache(str(tmp_path / "enrich.sqlite"))
+    try:
+        facts, stats = run(IRIS, cache, endpoints, offline=True)
+    finally:
+        cache.close()
+    assert facts == {} and stats["requests"] == 0
@@ -0,0 +1,149 @@
+import argparse
+import sqlite3
+from contextlib import contextmanager
+from xml_convert import TripleStream
+
+# ======== SQLite Triple Store ========= #
+#
+# Terms are stored once as N-Triples strings and triples as integer ids.
+# The triples table is clustered on (s, p, o) and two covering indexes add
+# (p, o, s) and (o, s, p), so every (s, p, o) pattern is a single index range.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    n3 TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS triples (
+    s INTEGER NOT NULL,
+    p INTEGER NOT NULL,
+    o INTEGER NOT NULL,
+    PRIMARY KEY (s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+"""
+
+class TripleStore:
+    """Persistent triple store; add() buffers rows, bulk() wraps a load in one transaction."""
+
+    def __init__(self, path="scott_pilgrim_master.sqlite", batch_size=10000):
+        self.path = path
+        # Autocommit mode: transactions are opened explicitly by bulk()
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.ids = {}
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ---- Loading ---- #
+
+    @contextmanager
+    def bulk(self, replace=False):
+        # One transaction for the whole load; replace=True empties the store first
+        self.conn.execute("BEGIN")
+        try:
+            if replace:
+                self.conn.execute("DELETE FROM triples")
+                self.conn.execute("DELETE FROM terms")
+                self.ids.clear()
+            yield self
+            self.flush()
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.pending.clear()
+            self.ids.clear()
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def term_id(self, n3, create=True):
+        i = self.ids.get(n3)
+        if i is None:
+            if create:
+                self.conn.execute("INSERT OR IGNORE INTO terms (n3) VALUES (?)", (n3,))
+            row = self.conn.execute("SELECT id FROM terms WHERE n3 = ?", (n3,)).fetchone()
+            if row is None:
+                return None
+            i = self.ids[n3] = row[0]
+        return i
+
+    def add(self, triple):
+        s, p, o = triple
+        self.pending.append((self.term_id(s.n3()), self.term_id(p.n3()), self.term_id(o.n3())))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.conn.executemany("INSERT OR IGNORE INTO triples (s, p, o) VALUES (?, ?, ?)", self.pending)
+            self.pending.clear()
+
+    def load(self, source, fmt="turtle", replace=True):
+        # Stream an RDF file into the store without building a Graph
+        with self.bulk(replace):
+            TripleStream(self.add).parse(source, format=fmt)
+
+    # ---- Queries ---- #
+
+    def triples(self, s=None, p=None, o=None):
+        """Yield (s, p, o) N-Triples strings matching a pattern (None = wildcard)."""
+        where, params = [], []
+        for col, n3 in (("s", s), ("p", p), ("o", o)):
+            if n3 is not None:
+                i = self.term_id(n3, create=False)
+                if i is None:
+                    return
+                where.append(f"t.{col} = ?")
+                params.append(i)
+        sql = ("SELECT ts.n3, tp.n3, tobj.n3 FROM triples t"
+               " JOIN terms ts ON ts.id = t.s"
+               " JOIN terms tp ON tp.id = t.p"
+               " JOIN terms tobj ON tobj.id = t.o")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        yield from self.conn.execute(sql, params)
+
+    def objects(self, s, p):
+        return [row[2] for row in self.triples(s, p, None)]
+
+    def subjects(self, p, o):
+        return [row[0] for row in self.triples(None, p, o)]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load or query the SQLite triple store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    load = sub.add_parser("load", help="replace the store contents with an RDF file")
+    load.add_argument("source", nargs="?", default="scott_pilgrim_master.ttl")
+    load.add_argument("--format", default="turtle")
+    load.add_argument("--db", default="scott_pilgrim_master.sqlite")
+
+    query = sub.add_parser("query", help="print triples matching a pattern (N-Triples terms)")
+    query.add_argument("--db", default="scott_pilgrim_master.sqlite")
+    query.add_argument("-s", help='subject, e.g. "<https://scottpilgrim.org/resource/char_scott_pilgrim>"')
+    query.add_argument("-p", help="predicate")
+    query.add_argument("-o", help="object")
+    args = parser.parse_args()
+
+    with TripleStore(args.db) as store:
+        if args.command == "load":
+            store.load(args.source, args.format)
+            print(f"Loaded {len(store)} triples into {args.db}")
+        else:
+            for row in store.triples(args.s, args.p, args.o):
+                print(" ".join(row), ".")
@@ -0,0 +1,94 @@
+import argparse
+import csv
+import os
+import sys
+from rdf_convert import MAPPINGS, NS, LOCAL, get_sp_uri, get_local_uri, default_data_dir
+
+# ======== Referential Integrity ========= #
+#
+# Every "local:" value becomes a URI in rdf_convert whether or not anything
+# defines it. This pass collects the subject ids of all tables into one set,
+# then checks every LOCAL column against it with plain set lookups, so the
+# cost is one read of each CSV and no graph is built. Tables whose subject
+# column only points at ids defined elsewhere (RLTNS.csv, "defines": False)
+# have that column checked as a reference too.
+
+def read_rows(path):
+    # Yields (line number, row) after the header
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        yield 1, header
+        for row in reader:
+            yield reader.line_num, row
+
+def subject_uri(spec, val):
+    return get_sp_uri(val) if spec.get("local") else NS["sp"][val]
+
+def collect_ids(base_dir="."):
+    """Returns (set of defined subject URIs, [(file, line, message), ...] read errors)."""
+    defined, errors = set(), []
+    for name, spec in MAPPINGS.items():
+        path = os.path.join(base_dir, name)
+        if not os.path.exists(path) or spec.get("defines") is False:
+            continue
+        try:
+            rows = read_rows(path)
+            _, header = next(rows)
+            cols = [header.index(c) for c in spec["subject"] if c in header]
+            for _, row in rows:
+                val = next((row[i] for i in cols if i < len(row) and row[i]), None)
+                if val:
+                    defined.add(subject_uri(spec, val))
+        except UnicodeDecodeError as e:
+            errors.append((name, None, f"not valid UTF-8 ({e.reason} at byte {e.start})"))
+    return defined, errors
+
+def find_dangling(defined, base_dir="."):
+    """Yields (file, line, column, value) for every local: reference not in defined."""
+    for name, spec in MAPPINGS.items():
+        path = os.path.join(base_dir, name)
+        if not os.path.exists(path):
+            continue
+        try:
+            rows = read_rows(path)
+            _, header = next(rows)
+            refs = [(header.index(c), c, col.sep) for c, col in spec["columns"].items()
+                    if col.kind == LOCAL and c in header]
+            if spec.get("defines") is False:
+                refs += [(header.index(c), c, None) for c in spec["subject"] if c in header]
+            for line, row in rows:
+                for i, column, sep in refs:
+                    val = row[i] if i < len(row) else ""
+                    if not val:
+                        continue
+                    for part in (val.split(sep) if sep else [val]):
+                        part = part.strip()
+                        if part and get_local_uri(part) not in defined:
+                            yield name, line, column, part
+        except UnicodeDecodeError:
+            continue  # already reported by collect_ids
+
+def check_references(base_dir="."):
+    """Returns (read errors, dangling references); both empty when the tables are consistent."""
+    defined, errors = collect_ids(base_dir)
+    return errors, list(find_dangling(defined, base_dir))
+
+def print_report(errors, dangling):
+    for name, _, message in errors:
+        print(f"{name}: {message}")
+    for name, line, column, value in dangling:
+        print(f"{name}:{line}: {column} -> {value} is not defined in any table")
+    print(f"{len(dangling)} unresolved reference(s), {len(errors)} unreadable file(s).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that every local: reference in the CSVs points at a defined id.")
+    parser.add_argument("base_dir", nargs="?", help="directory holding the CSV tables (default: the working directory if it has them, else csvs/)")
+    args = parser.parse_args()
+
+    base_dir = args.base_dir or default_data_dir()
+    if not any(os.path.exists(os.path.join(base_dir, name)) for name in MAPPINGS):
+        raise SystemExit(f"No mapped CSV tables found in {base_dir}")
+    errors, dangling = check_references(base_dir)
+    print_report(errors, dangling)
+    sys.exit(1 if errors or dangling else 0)
@@ -1,10 +1,220 @@
-from rdflib import Graph
-
-g = Graph()
-
-g.parse("scott_pilgrim_master.ttl", format="turtle")
-
-
-g.serialize(destination="scott_pilgrim_master.xml", format="pretty-xml")
-
-print("Conversion completed successfully: scott_pilgrim_master.xml")
\ No newline at end of file
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+from rdflib import Graph, BNode, Literal, XSD
+from rdflib.namespace import split_uri, is_ncname
+from rdf_convert import NS
+from snapshot import build_snapshot
+from instrument import span
+
+# ======== Streaming Parse ========= #
+
+class TripleStream(Graph):
+    """A Graph that keeps nothing: every parsed triple is handed to `emit` instead.
+
+    Lets any rdflib parser (Turtle, N-Triples, ...) feed a writer triple by triple.
+    """
+
+    def __init__(self, emit):
+        super().__init__()
+        self.emit = emit
+
+    def add(self, triple):
+        self.emit(triple)
+        return self
+
+# ======== Flat RDF/XML Writer ========= #
+
+# Characters XML 1.0 cannot carry at all, not even as character references
+XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+class RDFXMLWriter:
+    """Writes one flat rdf:Description per run of triples sharing a subject.
+
+    Raises ValueError for what RDF/XML cannot express, as rdflib's pretty-xml
+    does: a predicate with no NCName ending and literals with control characters.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.prefixes = {str(ns): prefix for prefix, ns in NS.items()}
+        self.prefixes[str(XSD)] = "xsd"
+        self.qnames = {}
+        self.subject = None
+        self.count = 0
+
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<rdf:RDF')
+        for ns, prefix in sorted(self.prefixes.items(), key=lambda x: x[1]):
+            f.write(f"\n   xmlns:{prefix}={quoteattr(ns)}")
+        f.write(">\n")
+
+    def qname(self, pred):
+        # (element name, extra xmlns declaration or "")
+        q = self.qnames.get(pred)
+        if q is None:
+            ns, local = split_uri(pred)
+            # ".../1a_b" can still be written as ns ".../1" + "a_b"; ".../123" cannot
+            cut = next((i for i in range(len(local)) if is_ncname(local[i:])), None)
+            if cut is None:
+                raise ValueError(f"Cannot write predicate {pred} in RDF/XML: it does not end in an XML name")
+            ns, local = ns + local[:cut], local[cut:]
+            if ns in self.prefixes:
+                q = (f"{self.prefixes[ns]}:{local}", "")
+            else:
+                # Namespace not in NS: declare it on the element itself
+                q = (f"ns1:{local}", f" xmlns:ns1={quoteattr(ns)}")
+            self.qnames[pred] = q
+        return q
+
+    def node_attr(self, kind, node):
+        if isinstance(node, BNode):
+            return f"rdf:nodeID={quoteattr(str(node))}"
+        return f"rdf:{kind}={quoteattr(str(node))}"
+
+    def add(self, triple):
+        s, p, o = triple
+        if s != self.subject:
+            if self.subject is not None:
+                self.f.write("  </rdf:Description>\n")
+            self.f.write(f"  <rdf:Description {self.node_attr('about', s)}>\n")
+            self.subject = s
+
+        name, xmlns = self.qname(p)
+        if isinstance(o, Literal):
+            if o.language:
+                attrs = f" xml:lang={quoteattr(o.language)}"
+            elif o.datatype:
+                attrs = f" rdf:datatype={quoteattr(str(o.datatype))}"
+            else:
+                attrs = ""
+            if XML_ILLEGAL.search(o):
+                raise ValueError(f"Cannot write literal {o.n3()} of {s} in XML 1.0: it contains a control character")
+            self.f.write(f"    <{name}{xmlns}{attrs}>{escape(str(o))}</{name}>\n")
+        else:
+            self.f.write(f"    <{name}{xmlns} {self.node_attr('resource', o)}/>\n")
+        self.count += 1
+
+    def close(self):
+        if self.subject is not None:
+            self.f.write("  </rdf:Description>\n")
+        self.f.write("</rdf:RDF>\n")
+
+def convert_streaming(source, destination, fmt="turtle"):
+    # Parsing and writing are interleaved, so this is one stage
+    with span("parse_and_write_xml", source=source) as s, open(destination, "w", encoding="utf-8") as f:
+        writer = RDFXMLWriter(f)
+        TripleStream(writer.add).parse(source, format=fmt)
+        writer.close()
+        s.count("triples", writer.count)
+    s.count("bytes_written", os.path.getsize(destination))
+    return writer.count
+
+def convert_pretty(source, destination, fmt="turtle"):
+    # Original behaviour: full Graph + nested pretty-xml (slow on large graphs)
+    g = parse(source, fmt)
+    with span("serialize", format="pretty-xml") as s:
+        g.serialize(destination=destination, format="pretty-xml")
+        s.count("bytes_written", os.path.getsize(destination))
+    return len(g)
+
+def parse(source, fmt="turtle"):
+    with span("parse", source=source) as s:
+        g = Graph()
+        g.parse(source, format=fmt)
+        s.count("triples", len(g))
+    return g
+
+# ======== Multi-format Export ========= #
+
+# Export format -> file extension
+EXPORTS = {
+    "turtle": ".ttl",
+    "nt": ".nt",
+    "xml": ".xml",          # flat RDF/XML (RDFXMLWriter)
+    "pretty-xml": ".xml",   # rdflib's nested RDF/XML
+    "json-ld": ".jsonld",
+    "snapshot": ".snap",    # binary snapshot (snapshot.py)
+}
+
+def write_flat_xml(g, destination):
+    with open(destination, "w", encoding="utf-8") as f:
+        writer = RDFXMLWriter(f)
+        for s in g.subjects(unique=True):
+            for p, o in g.predicate_objects(s):
+                writer.add((s, p, o))
+        writer.close()
+
+def export_one(g, fmt, destination):
+    start = time.perf_counter()
+    with span("serialize", format=fmt) as s:
+        if fmt == "xml":
+            write_flat_xml(g, destination)
+        elif fmt == "snapshot":
+            build_snapshot(g, destination)
+        else:
+            g.serialize(destination=destination, format=fmt, encoding="utf-8")
+        size = os.path.getsize(destination)
+        s.count("bytes_written", size)
+    return fmt, destination, time.perf_counter() - start, size
+
+# Writers of our own that only read the Graph, so they can share it across threads
+THREAD_SAFE = {"xml", "snapshot"}
+
+def export(source, formats, fmt="turtle", base=None, workers=None):
+    """Parse source once and write it in every requested format.
+
+    The flat XML and snapshot writers run in a thread pool while rdflib's
+    serializers run one after another in this thread: those bind prefixes on
+    the Graph's shared namespace manager as they go, and concurrent runs mix
+    them up. Returns (parse seconds, [(format, path, seconds, bytes), ...]).
+    """
+    base = base or os.path.splitext(source)[0]
+    jobs = []
+    for name in formats:
+        destination = base + EXPORTS[name]
+        if os.path.abspath(destination) == os.path.abspath(source):
+            continue  # never overwrite the file we are reading
+        jobs.append((name, destination))
+
+    start = time.perf_counter()
+    g = parse(source, fmt)
+    parse_time = time.perf_counter() - start
+
+    threaded = [job for job in jobs if job[0] in THREAD_SAFE]
+    with ThreadPoolExecutor(max_workers=workers or len(threaded) or 1) as pool:
+        futures = {job: pool.submit(export_one, g, *job) for job in threaded}
+        done = {job: export_one(g, *job) for job in jobs if job not in futures}
+        done.update((job, future.result()) for job, future in futures.items())
+    return parse_time, [done[job] for job in jobs]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the master Turtle graph to RDF/XML.")
+    parser.add_argument("source", nargs="?", default="scott_pilgrim_master.ttl")
+    parser.add_argument("destination", nargs="?", default="scott_pilgrim_master.xml")
+    parser.add_argument("--format", default="turtle", help="input format (turtle, nt, ...)")
+    parser.add_argument("--pretty", action="store_true", help="use rdflib's nested pretty-xml serializer instead of streaming")
+    parser.add_argument("--export", metavar="FORMATS",
+                        help=f"comma-separated formats written next to the source from one parse ({', '.join(EXPORTS)})")
+    args = parser.parse_args()
+
+    if args.export:
+        formats = [f.strip() for f in args.export.split(",") if f.strip()]
+        unknown = [f for f in formats if f not in EXPORTS]
+        if unknown:
+            parser.error(f"unknown export format(s): {', '.join(unknown)}")
+        if "xml" in formats and "pretty-xml" in formats:
+            parser.error("xml and pretty-xml write the same file, pick one")
+
+        parse_time, results = export(args.source, formats, args.format)
+        print(f"{'parse':<12} {parse_time:>8.3f}s  {args.source}")
+        for name, destination, seconds, size in results:
+            print(f"{name:<12} {seconds:>8.3f}s  {size:>10} bytes  {destination}")
+        for name in set(formats) - {r[0] for r in results}:
+            print(f"{name:<12} skipped, same file as the source")
+    else:
+        convert = convert_pretty if args.pretty else convert_streaming
+        count = convert(args.source, args.destination, args.format)
+        print(f"Conversion completed successfully: {args.destination} ({count} triples)")